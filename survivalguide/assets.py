@@ -0,0 +1,152 @@
+"""
+Content-hashed, precompressed static files.
+
+``collectstatic`` with ``CompressedManifestStaticFilesStorage`` copies every
+file under a name containing a hash of its contents, writes the name mapping
+to ``staticfiles.json`` in ``STATIC_ROOT`` and stores ``.gz`` (and, when the
+``brotli`` package is installed, ``.br``) siblings next to each text asset.
+``{% static %}`` resolves names through that manifest, so no file is read or
+hashed at request time.
+
+``CompressedWhiteNoise`` serves the smallest variant the client accepts and
+marks hashed files ``immutable``: a new build means new URLs, so browsers
+never need to revalidate.
+"""
+from __future__ import absolute_import
+
+import gzip
+import io
+import json
+import os
+import re
+from wsgiref.headers import Headers
+
+from django.contrib.staticfiles.storage import (CachedFilesMixin,
+                                                CachedStaticFilesStorage)
+from django.utils.six.moves.urllib.parse import urldefrag
+
+from whitenoise.django import DjangoWhiteNoise
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class CompressedManifestStaticFilesStorage(CachedStaticFilesStorage):
+    manifest_name = 'staticfiles.json'
+    compress_extensions = ('.css', '.js', '.svg', '.html', '.txt', '.json',
+                           '.xml', '.map', '.eot', '.otf', '.ttf')
+    # Don't bother keeping a variant that saves less than this.
+    min_compression_ratio = 0.95
+
+    def __init__(self, *args, **kwargs):
+        super(CompressedManifestStaticFilesStorage, self).__init__(
+            *args, **kwargs)
+        self.manifest = self.load_manifest()
+
+    def load_manifest(self):
+        if not self.location:
+            return {}
+        try:
+            with open(self.path(self.manifest_name)) as manifest:
+                return json.load(manifest)
+        except (IOError, OSError, ValueError):
+            return {}
+
+    def url(self, name, force=False):
+        if force:
+            # Rewriting url()s inside CSS during post_process, when the
+            # manifest is still being built.
+            return super(CompressedManifestStaticFilesStorage, self).url(
+                name, force=True)
+        clean_name, fragment = urldefrag(name)
+        hashed_name = self.manifest.get(clean_name)
+        if hashed_name is None:
+            # Not collected yet, as in development: use the original file.
+            return super(CachedFilesMixin, self).url(name)
+        url = super(CachedFilesMixin, self).url(hashed_name)
+        if fragment:
+            url = '{0}#{1}'.format(url, fragment)
+        return url
+
+    def post_process(self, paths, dry_run=False, **options):
+        if dry_run:
+            return
+        manifest = {}
+        processor = super(CompressedManifestStaticFilesStorage,
+                          self).post_process(paths, dry_run, **options)
+        for name, hashed_name, processed in processor:
+            if hashed_name is not None and not isinstance(hashed_name,
+                                                          Exception):
+                manifest[name.replace('\\', '/')] = hashed_name
+            yield name, hashed_name, processed
+
+        for hashed_name in manifest.values():
+            if hashed_name.endswith(self.compress_extensions):
+                self.compress(hashed_name)
+        with open(self.path(self.manifest_name), 'w') as output:
+            json.dump(manifest, output, indent=0, sort_keys=True)
+        self.manifest = manifest
+
+    def compress(self, name):
+        """Write ``.gz`` and ``.br`` siblings of ``name`` where they're
+        worth having."""
+        path = self.path(name)
+        with open(path, 'rb') as original:
+            content = original.read()
+        variants = [('.gz', gzip_bytes(content))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(content) * self.min_compression_ratio:
+                with open(path + suffix, 'wb') as output:
+                    output.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+def gzip_bytes(content):
+    # A fixed mtime keeps the output identical between builds.
+    buffer = io.BytesIO()
+    with gzip.GzipFile(filename='', mode='wb', fileobj=buffer,
+                       compresslevel=9, mtime=0) as compressed:
+        compressed.write(content)
+    return buffer.getvalue()
+
+
+class CompressedWhiteNoise(DjangoWhiteNoise):
+    """``DjangoWhiteNoise`` that also serves ``.br`` variants and lets
+    browsers cache hashed files without ever revalidating them."""
+    BROTLI_SUFFIX = '.br'
+    ACCEPT_BROTLI_RE = re.compile(r'\bbr\b')
+
+    def add_extra_headers(self, static_file, url):
+        if self.is_versioned_file(url):
+            static_file.headers['Cache-Control'] = (
+                'public, max-age={0}, immutable'.format(self.FOREVER))
+
+    def find_gzipped_alternatives(self, files):
+        super(CompressedWhiteNoise, self).find_gzipped_alternatives(files)
+        for url, static_file in files.items():
+            brotli_file = files.get(url + self.BROTLI_SUFFIX)
+            if brotli_file is None:
+                static_file.brotli_path = None
+                static_file.brotli_headers = None
+                continue
+            static_file.brotli_path = brotli_file.path
+            static_file.headers['Vary'] = 'Accept-Encoding'
+            static_file.brotli_headers = Headers(
+                list(static_file.headers.items()))
+            static_file.brotli_headers['Content-Encoding'] = 'br'
+            # The copied headers may describe the uncompressed file.
+            static_file.brotli_headers['Content-Length'] = str(
+                os.path.getsize(brotli_file.path))
+
+    def get_path_and_headers(self, static_file, environ):
+        if static_file.brotli_path:
+            accept_encoding = environ.get('HTTP_ACCEPT_ENCODING', '')
+            if self.ACCEPT_BROTLI_RE.search(accept_encoding):
+                return static_file.brotli_path, static_file.brotli_headers
+        return super(CompressedWhiteNoise, self).get_path_and_headers(
+            static_file, environ)
@@ -0,0 +1,95 @@
+"""
+Cached lookup of the logged-in user.
+
+``CachedAuthenticationMiddleware`` gets ``request.user`` from here instead of
+from ``ModelBackend.get_user``. The cache holds a handful of columns per
+user; the user is rebuilt from them as a deferred ``User``, so any other
+field is still loaded on first access and ``save()`` only writes the cached
+columns. Entries are dropped when the user is saved or deleted (which
+covers password changes) and on logout, and refreshed on login.
+"""
+from __future__ import absolute_import
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, SESSION_KEY, get_user
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.query_utils import deferred_class_factory
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+CACHED_FIELDS = ('id', 'username', 'email', 'is_active', 'is_staff',
+                 'is_superuser')
+TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60 * 60)
+
+CachedUser = deferred_class_factory(
+    User, [field.attname for field in User._meta.concrete_fields
+           if field.attname not in CACHED_FIELDS])
+
+
+def cache_key(user_id):
+    return 'auth:user:{0}'.format(user_id)
+
+
+def remember_user(user):
+    cache.set(cache_key(user.pk),
+              dict((field, getattr(user, field)) for field in CACHED_FIELDS),
+              TIMEOUT)
+
+
+def forget_user(user_id):
+    cache.delete(cache_key(user_id))
+
+
+def get_cached_user(user_id):
+    """Return the user with ``user_id``, from the cache if possible, or
+    ``None`` if there's no such user."""
+    data = cache.get(cache_key(user_id))
+    if data is None:
+        try:
+            user = User.objects.only(*CACHED_FIELDS).get(pk=user_id)
+        except User.DoesNotExist:
+            return None
+        remember_user(user)
+        return user
+    user = CachedUser(**data)
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+def get_request_user(request):
+    """Like ``django.contrib.auth.get_user`` but served from the cache for
+    users authenticated by ``ModelBackend``."""
+    try:
+        user_id = request.session[SESSION_KEY]
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if (backend_path != MODEL_BACKEND or
+            backend_path not in settings.AUTHENTICATION_BACKENDS):
+        return get_user(request)
+    return get_cached_user(user_id) or AnonymousUser()
+
+
+# Saves of a CachedUser are sent with the deferred class as their sender.
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=CachedUser)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_left(sender, request, user, **kwargs):
+    if user is not None and user.pk is not None:
+        forget_user(user.pk)
+
+
+@receiver(user_logged_in)
+def user_arrived(sender, request, user, **kwargs):
+    remember_user(user)
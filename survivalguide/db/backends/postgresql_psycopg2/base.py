@@ -0,0 +1,27 @@
+"""
+``django.db.backends.postgresql_psycopg2`` with pooled connections.
+"""
+from __future__ import absolute_import
+
+from django.db.backends.postgresql_psycopg2 import base
+
+from survivalguide.db.pool import (PooledDatabaseCreationMixin,
+                                   PooledDatabaseWrapperMixin)
+
+DatabaseError = base.DatabaseError
+IntegrityError = base.IntegrityError
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin, base.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super(DatabaseWrapper, self).__init__(*args, **kwargs)
+        self.creation = DatabaseCreation(self)
+
+    def ping_connection(self, connection):
+        if connection.closed:
+            raise DatabaseError('connection already closed')
+        super(DatabaseWrapper, self).ping_connection(connection)
@@ -0,0 +1,28 @@
+"""
+``django.db.backends.sqlite3`` with pooled connections. Mostly useful as a
+stand-in for Postgres when working on the pool itself; in-memory databases
+are never pooled.
+"""
+from __future__ import absolute_import
+
+from django.db.backends.sqlite3 import base
+
+from survivalguide.db.pool import (PooledDatabaseCreationMixin,
+                                   PooledDatabaseWrapperMixin)
+
+DatabaseError = base.DatabaseError
+IntegrityError = base.IntegrityError
+
+
+class DatabaseCreation(PooledDatabaseCreationMixin, base.DatabaseCreation):
+    pass
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super(DatabaseWrapper, self).__init__(*args, **kwargs)
+        self.creation = DatabaseCreation(self)
+
+    def pool_enabled(self):
+        return (self.settings_dict['NAME'] != ':memory:' and
+                super(DatabaseWrapper, self).pool_enabled())
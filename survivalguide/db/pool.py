@@ -0,0 +1,277 @@
+"""
+Process-wide database connection pooling.
+
+Django opens a new connection for every request and closes it when the
+response is done. The backends in ``survivalguide.db.backends`` instead
+check connections out of a ``ConnectionPool`` in ``get_new_connection`` and
+hand them back in ``_close``, so Django's per-request lifecycle is unchanged
+while the expensive connect happens once per pooled connection.
+
+One pool exists per database per process. Gunicorn's sync workers use one
+connection each; threaded workers share up to ``SIZE`` connections between
+their threads. A pool notices when it has been inherited across ``fork()``
+and starts over rather than sharing the parent's sockets. Idle connections
+to a test database are closed before it is dropped.
+
+Configure it per database::
+
+    DATABASES['default']['POOL'] = {
+        'SIZE': 4,              # connections per worker process
+        'MAX_LIFETIME': 600,    # seconds before a connection is replaced
+        'TIMEOUT': 10,          # seconds to wait for a free connection
+        'PING_AFTER': 1,        # ping connections idle longer than this
+    }
+"""
+from __future__ import absolute_import
+
+import os
+import threading
+import time
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class PoolStats(object):
+    FIELDS = ('created', 'reused', 'recycled', 'failed_checks', 'discarded',
+              'waits', 'timeouts')
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self):
+        return dict((field, getattr(self, field)) for field in self.FIELDS)
+
+
+class ConnectionPool(object):
+    """A bounded LIFO pool of DB-API connections.
+
+    ``acquire(connect)`` returns an idle connection that passes ``ping`` or
+    a new one from ``connect()``, waiting up to ``timeout`` seconds when
+    ``size`` connections are already out. Connections older than
+    ``max_lifetime`` seconds are closed instead of reused.
+    """
+    def __init__(self, size=4, max_lifetime=600, timeout=10, ping=None,
+                 ping_after=0):
+        self.size = size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.ping = ping
+        self.ping_after = ping_after
+        self.stats = PoolStats()
+        self._condition = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # (connection, created_at, released_at), most recently used last.
+        self._idle = []
+        self._created_at = {}
+        self._open = 0
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # Forked: the connections belong to the parent. Keep references
+            # so garbage collection doesn't close the parent's sockets.
+            self._orphans = getattr(self, '_orphans', []) + [
+                connection for connection, _, _ in self._idle]
+            self._reset()
+
+    def acquire(self, connect):
+        deadline = time.time() + self.timeout
+        while True:
+            entry = self._take(deadline)
+            if entry is None:
+                return self._create(connect)
+            connection, created_at, released_at = entry
+            now = time.time()
+            if now - created_at >= self.max_lifetime:
+                self.stats.recycled += 1
+                self._discard(connection)
+            elif self._alive(connection, now - released_at):
+                self.stats.reused += 1
+                return connection
+            else:
+                self.stats.failed_checks += 1
+                self._discard(connection)
+
+    def _take(self, deadline):
+        """Pop an idle connection, or return ``None`` after reserving room
+        for a new one."""
+        with self._condition:
+            self._check_pid()
+            waited = False
+            while not self._idle and self._open >= self.size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise PoolTimeout(
+                        'No database connection free after {0}s; all {1} '
+                        'are in use.'.format(self.timeout, self.size))
+                if not waited:
+                    self.stats.waits += 1
+                    waited = True
+                self._condition.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+            return None
+
+    def _create(self, connect):
+        try:
+            connection = connect()
+        except Exception:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._created_at[id(connection)] = time.time()
+        self.stats.created += 1
+        return connection
+
+    def _alive(self, connection, idle_for):
+        if self.ping is None or idle_for < self.ping_after:
+            return True
+        try:
+            self.ping(connection)
+        except Exception:
+            return False
+        return True
+
+    def release(self, connection, discard=False):
+        """Return ``connection`` to the pool, or close it if ``discard`` or
+        it has outlived ``max_lifetime``."""
+        with self._condition:
+            if self._pid != os.getpid():
+                return
+            created_at = self._created_at.get(id(connection))
+            if created_at is None:
+                # Checked out before a fork, or never ours.
+                return
+            now = time.time()
+            if not discard and now - created_at < self.max_lifetime:
+                self._idle.append((connection, created_at, now))
+                self._condition.notify()
+                return
+        if discard:
+            self.stats.discarded += 1
+        else:
+            self.stats.recycled += 1
+        self._discard(connection)
+
+    def _discard(self, connection):
+        with self._condition:
+            self._created_at.pop(id(connection), None)
+            self._open -= 1
+            self._condition.notify()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_all(self):
+        """Close every idle connection. Connections that are checked out
+        are closed when they come back only if they've expired."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+        for connection, _, _ in idle:
+            self._discard(connection)
+
+    def summary(self):
+        with self._condition:
+            summary = self.stats.as_dict()
+            summary.update(size=self.size, open=self._open,
+                           idle=len(self._idle),
+                           in_use=self._open - len(self._idle))
+        return summary
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(key, label, **options):
+    """Return the process's pool for ``key``, creating it with ``options``
+    the first time."""
+    with _pools_lock:
+        try:
+            return _pools[key][1]
+        except KeyError:
+            pool = ConnectionPool(**options)
+            _pools[key] = (label, pool)
+            return pool
+
+
+def close_pools(alias):
+    """Close the idle connections of every pool for database ``alias`` in
+    this process."""
+    with _pools_lock:
+        pools = [pool for key, (_, pool) in _pools.items()
+                 if key[0] == alias]
+    for pool in pools:
+        pool.close_all()
+
+
+def summaries():
+    """Metrics for every pool in this process, keyed by database."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return dict((label, pool.summary()) for label, pool in pools)
+
+
+class PooledDatabaseWrapperMixin(object):
+    """Mixed into a backend's ``DatabaseWrapper`` to take connections from a
+    ``ConnectionPool`` configured by the database's ``POOL`` setting."""
+
+    def ping_connection(self, connection):
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def pool_enabled(self):
+        return bool(self.settings_dict.get('POOL'))
+
+    def get_connection_pool(self, conn_params):
+        options = self.settings_dict['POOL']
+        key = (self.alias, repr(sorted(conn_params.items())))
+        return get_pool(
+            key, '{0}:{1}'.format(self.alias, self.settings_dict['NAME']),
+            size=options.get('SIZE', 4),
+            max_lifetime=options.get('MAX_LIFETIME', 600),
+            timeout=options.get('TIMEOUT', 10),
+            ping_after=options.get('PING_AFTER', 0),
+            ping=self.ping_connection)
+
+    def get_new_connection(self, conn_params):
+        parent = super(PooledDatabaseWrapperMixin, self)
+        if not self.pool_enabled():
+            self._pool = None
+            return parent.get_new_connection(conn_params)
+        self._pool = self.get_connection_pool(conn_params)
+        return self._pool.acquire(
+            lambda: parent.get_new_connection(conn_params))
+
+    def _close(self):
+        pool = getattr(self, '_pool', None)
+        if pool is None or self.connection is None:
+            return super(PooledDatabaseWrapperMixin, self)._close()
+        # Only hand back connections in a known, clean state.
+        discard = (self.errors_occurred or self.in_atomic_block or
+                   not self.autocommit)
+        pool.release(self.connection, discard=discard)
+
+
+class PooledDatabaseCreationMixin(object):
+    """Mixed into a backend's ``DatabaseCreation`` so that pooled
+    connections to a test database don't stop it from being dropped."""
+
+    def destroy_test_db(self, old_database_name, verbosity=1):
+        self.connection.close()
+        close_pools(self.connection.alias)
+        super(PooledDatabaseCreationMixin, self).destroy_test_db(
+            old_database_name, verbosity)
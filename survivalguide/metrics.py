@@ -0,0 +1,93 @@
+"""
+In-process metrics: rolling latency histograms and simple counters.
+
+Everything here lives in the memory of a single worker process, so numbers
+reset on restart and each gunicorn worker reports only what it has served.
+"""
+import collections
+import math
+import threading
+
+from django.conf import settings
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return None
+    # Multiply before dividing so whole-number ranks stay exact.
+    rank = max(0, int(math.ceil(pct * len(sorted_values) / 100.0)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RollingHistogram(object):
+    """Keeps the most recent ``size`` samples and summarises them as
+    percentiles on demand, so recording is O(1)."""
+    def __init__(self, size):
+        self.count = 0
+        self._samples = collections.deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, value):
+        with self._lock:
+            self.count += 1
+            self._samples.append(value)
+
+    def summary(self, percentiles=(50, 95, 99)):
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        result = {'count': count}
+        for pct in percentiles:
+            result['p{0}'.format(pct)] = percentile(samples, pct)
+        return result
+
+
+class HistogramSet(object):
+    """Rolling histograms grouped by a key, such as a URL name, and then by
+    metric name."""
+    def __init__(self, size):
+        self.size = size
+        self._histograms = collections.defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def histogram(self, key, metric):
+        try:
+            return self._histograms[key][metric]
+        except KeyError:
+            with self._lock:
+                return self._histograms[key].setdefault(
+                    metric, RollingHistogram(self.size))
+
+    def record(self, key, metric, value):
+        self.histogram(key, metric).record(value)
+
+    def summary(self):
+        with self._lock:
+            items = [(key, dict(metrics))
+                     for key, metrics in self._histograms.items()]
+        return dict(
+            (key, dict((metric, histogram.summary())
+                       for metric, histogram in metrics.items()))
+            for key, metrics in items)
+
+
+class CounterSet(object):
+    """Counts of events grouped by a key and then by outcome."""
+    def __init__(self):
+        self._counts = collections.defaultdict(collections.Counter)
+        self._lock = threading.Lock()
+
+    def increment(self, key, outcome, amount=1):
+        with self._lock:
+            self._counts[key][outcome] += amount
+
+    def summary(self):
+        with self._lock:
+            return dict((key, dict(counts))
+                        for key, counts in self._counts.items())
+
+
+request_timings = HistogramSet(
+    getattr(settings, 'SERVER_TIMING_WINDOW', 1024))
+rate_limits = CounterSet()
@@ -0,0 +1,144 @@
+from __future__ import absolute_import
+
+import threading
+import time
+
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+from . import auth
+from . import metrics
+
+
+_request_stats = threading.local()
+
+
+class TimedCursor(object):
+    """Wraps a DB-API cursor to add its query count and time to the stats
+    of the request being served on this thread."""
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def __getattr__(self, attr):
+        return getattr(self.cursor, attr)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def _timed(self, method, *args):
+        start = time.time()
+        try:
+            return method(*args)
+        finally:
+            stats = getattr(_request_stats, 'current', None)
+            if stats is not None:
+                stats.sql_count += 1
+                stats.sql_time += time.time() - start
+
+    def execute(self, *args):
+        return self._timed(self.cursor.execute, *args)
+
+    def executemany(self, *args):
+        return self._timed(self.cursor.executemany, *args)
+
+
+def instrument_connection(connection):
+    """Time every cursor ``connection`` creates. Connections are
+    per-thread and long lived, so this runs once per thread and alias."""
+    if getattr(connection, '_server_timing', False):
+        return
+    create_cursor = connection.create_cursor
+
+    def timed_create_cursor():
+        return TimedCursor(create_cursor())
+
+    connection.create_cursor = timed_create_cursor
+    connection._server_timing = True
+
+
+class RequestStats(object):
+    def __init__(self):
+        self.start = time.time()
+        self.view_start = self.view_end = self.render_end = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+
+class ServerTimingMiddleware(object):
+    """Report SQL, view and template time for each request in a
+    ``Server-Timing`` header and record them, per URL name, in
+    ``metrics.request_timings``.
+
+    Keep this first in ``MIDDLEWARE_CLASSES`` so the total covers the other
+    middleware and template rendering is timed right up to the response.
+    """
+    def process_request(self, request):
+        for connection in connections.all():
+            instrument_connection(connection)
+        _request_stats.current = request._server_timing = RequestStats()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, '_server_timing', None)
+        if stats is not None:
+            stats.view_start = time.time()
+
+    def process_template_response(self, request, response):
+        stats = getattr(request, '_server_timing', None)
+        if stats is not None:
+            stats.view_end = time.time()
+
+            def rendered(response):
+                stats.render_end = time.time()
+            response.add_post_render_callback(rendered)
+        return response
+
+    def process_response(self, request, response):
+        stats = getattr(request, '_server_timing', None)
+        if stats is None:
+            return response
+        _request_stats.current = None
+
+        end = time.time()
+        timings = [('total', end - stats.start, None),
+                   ('db', stats.sql_time,
+                    '{0} queries'.format(stats.sql_count))]
+        if stats.view_start is not None:
+            timings.append(('view', (stats.view_end or end) - stats.view_start,
+                            None))
+        if stats.render_end is not None:
+            timings.append(('tpl', stats.render_end - stats.view_end, None))
+
+        entries = []
+        for name, seconds, description in timings:
+            entry = name
+            if description:
+                entry += ';desc="{0}"'.format(description)
+            entries.append('{0};dur={1:.1f}'.format(entry, seconds * 1000))
+        response['Server-Timing'] = ', '.join(entries)
+
+        url_name = self.url_name(request)
+        for name, seconds, _ in timings:
+            metrics.request_timings.record(url_name, name, seconds * 1000)
+        metrics.request_timings.record(url_name, 'queries', stats.sql_count)
+        return response
+
+    def url_name(self, request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.url_name:
+            return '<unresolved>'
+        return ':'.join(match.namespaces + [match.url_name])
+
+
+class CachedAuthenticationMiddleware(object):
+    """Drop-in replacement for ``AuthenticationMiddleware`` that loads
+    ``request.user`` through ``survivalguide.auth``'s cache."""
+    def process_request(self, request):
+        assert hasattr(request, 'session'), (
+            'CachedAuthenticationMiddleware requires SessionMiddleware to '
+            'be installed before it.')
+        request.user = SimpleLazyObject(lambda: self.get_user(request))
+
+    def get_user(self, request):
+        if not hasattr(request, '_cached_user'):
+            request._cached_user = auth.get_request_user(request)
+        return request._cached_user
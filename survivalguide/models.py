@@ -0,0 +1,5 @@
+# No models. Importing the auth module here connects its signal receivers in
+# every process, management commands included.
+from __future__ import absolute_import
+
+from . import auth  # noqa
@@ -0,0 +1,119 @@
+"""
+Token bucket rate limits for the login and signup forms.
+
+Checking a password means a PBKDF2 hash, slow by design, so a burst of bad
+logins or scripted signups keeps every worker busy hashing. Each POST to a
+limited form takes a token from a bucket for the client's address and one
+for the username it names. When either bucket is empty the request is
+answered with a 429 before the form is validated, so nothing is hashed.
+Buckets hold up to ``capacity`` tokens and refill at an even rate, the full
+capacity every ``period`` seconds.
+
+Buckets live in the shared cache so every worker counts against the same
+ones. A bucket is read and written with separate cache calls, so workers
+racing on one bucket can each take the same token and a limit may be
+overshot by about the number of workers. Allowed and limited requests are
+counted in ``metrics.rate_limits``.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.forms.forms import NON_FIELD_ERRORS
+from django.forms.util import ErrorDict
+
+from . import metrics
+
+
+# Per form, ``{kind: (capacity, period)}`` for each kind of bucket.
+LIMITS = getattr(settings, 'RATE_LIMITS', {
+    'login': {'ip': (30, 60), 'username': (10, 60)},
+    'signup': {'ip': (10, 60 * 10), 'username': (5, 60)},
+})
+TRUST_PROXY = getattr(settings, 'RATE_LIMIT_TRUST_PROXY', False)
+
+
+def client_ip(request):
+    """The client's address, or the one the proxy in front of us saw when
+    ``RATE_LIMIT_TRUST_PROXY`` is set. Only the last X-Forwarded-For entry
+    is used, since clients can send the header with anything in it."""
+    if TRUST_PROXY:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class RateLimit(object):
+    def __init__(self, name, limits=None):
+        self.name = name
+        self.limits = limits or LIMITS[name]
+
+    def cache_key(self, kind, value):
+        # Hashed, since usernames may hold characters memcached rejects.
+        digest = hashlib.sha1(value.encode('utf-8')).hexdigest()
+        return 'ratelimit:{0}:{1}:{2}'.format(self.name, kind, digest)
+
+    def take(self, keys, now=None):
+        """Take a token from the bucket of each ``(kind, value)`` in
+        ``keys``, unless one of them is empty. Returns the seconds until the
+        request would be allowed, or 0 if it is. Costs two cache calls when
+        allowed and one when not."""
+        now = time.time() if now is None else now
+        kinds = dict((self.cache_key(kind, value), kind)
+                     for kind, value in keys
+                     if value and kind in self.limits)
+        buckets = cache.get_many(list(kinds))
+        tokens = {}
+        wait = 0
+        for key, kind in kinds.items():
+            capacity, period = self.limits[kind]
+            rate = float(capacity) / period
+            available, updated = buckets.get(key, (capacity, now))
+            tokens[key] = min(capacity, available + (now - updated) * rate)
+            if tokens[key] < 1:
+                wait = max(wait, (1 - tokens[key]) / rate)
+                metrics.rate_limits.increment(self.name,
+                                              'limited_by_' + kind)
+        if wait:
+            metrics.rate_limits.increment(self.name, 'limited')
+            return wait
+        metrics.rate_limits.increment(self.name, 'allowed')
+        # An untouched bucket is full again after a period, so let it go.
+        cache.set_many(dict((key, (available - 1, now))
+                            for key, available in tokens.items()),
+                       max(period for _, period in self.limits.values()))
+        return 0
+
+
+class RateLimitMixin(object):
+    """Checks ``rate_limit`` on POST before the form is validated, and
+    shows the form again with a 429 when it's exceeded."""
+    rate_limit = None
+    username_field = 'username'
+    rate_limited_message = ('Too many attempts. Please wait a minute and '
+                            'try again.')
+
+    def post(self, request, *args, **kwargs):
+        wait = self.rate_limit.take([
+            ('ip', client_ip(request)),
+            ('username', request.POST.get(self.username_field, '').lower()),
+        ])
+        if wait:
+            return self.rate_limited(wait)
+        return super(RateLimitMixin, self).post(request, *args, **kwargs)
+
+    def rate_limited(self, wait):
+        form = self.get_form(self.get_form_class())
+        # Set the errors directly: validating would hash the password.
+        form._errors = ErrorDict({
+            NON_FIELD_ERRORS: form.error_class([self.rate_limited_message]),
+        })
+        response = self.render_to_response(
+            self.get_context_data(form=form), status=429)
+        response['Retry-After'] = str(int(math.ceil(wait)))
+        return response
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/1.6/ref/settings/
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 import os
+import tempfile
 
 import dj_database_url
 
@@ -44,14 +45,16 @@ INSTALLED_APPS = (
     'south',
     'debug_toolbar',
     'gunicorn',
+    'survivalguide',
     'talks',
 )
 
 MIDDLEWARE_CLASSES = (
+    'survivalguide.middleware.ServerTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'survivalguide.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 )
@@ -70,6 +73,60 @@ DATABASES = {
     )
 }
 
+# Pool connections within each worker process instead of connecting for
+# every request. See survivalguide/db/pool.py.
+DATABASES['default']['POOL'] = {
+    'SIZE': int(os.environ.get('DATABASE_POOL_SIZE', 4)),
+    'MAX_LIFETIME': int(os.environ.get('DATABASE_POOL_MAX_LIFETIME', 600)),
+    'TIMEOUT': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+    'PING_AFTER': int(os.environ.get('DATABASE_POOL_PING_AFTER', 1)),
+}
+POOLED_BACKENDS = ('postgresql_psycopg2', 'sqlite3')
+_backend = DATABASES['default']['ENGINE'].rsplit('.', 1)[-1]
+if _backend in POOLED_BACKENDS:
+    DATABASES['default']['ENGINE'] = (
+        'survivalguide.db.backends.{0}'.format(_backend))
+    # South picks its schema editor from ENGINE, which no longer names a
+    # stock backend.
+    SOUTH_DATABASE_ADAPTERS = {'default': 'south.db.{0}'.format(_backend)}
+
+# Caches and sessions
+# A cache shared by every worker on the machine: memcached when
+# MEMCACHED_LOCATION is set, files on local disk otherwise. Production
+# should use memcached. The file cache counts its files on every write and
+# culls a quarter of them once it holds MAX_ENTRIES, so it's sized to keep
+# sessions, users, schedule fragments and rate limit buckets from evicting
+# each other under development and load test traffic.
+
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.environ['MEMCACHED_LOCATION'].split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'CACHE_DIR',
+                os.path.join(tempfile.gettempdir(), 'survivalguide-cache')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', 20000)),
+                'CULL_FREQUENCY': 4,
+            },
+        }
+    }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Logins and signups are rate limited in the cache; see
+# survivalguide/ratelimit.py. Behind a proxy that appends the client's
+# address to X-Forwarded-For, as Heroku's router does, set
+# RATE_LIMIT_TRUST_PROXY so clients are told apart by that address.
+RATE_LIMIT_TRUST_PROXY = bool(os.environ.get('RATE_LIMIT_TRUST_PROXY'))
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
@@ -89,11 +146,22 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join('static')
+STATICFILES_STORAGE = (
+    'survivalguide.assets.CompressedManifestStaticFilesStorage')
 
 TEMPLATE_DIRS = (
     os.path.join(BASE_DIR, 'templates'),
 )
 
+# Compile each template once per worker. Restart the server to pick up
+# template edits.
+TEMPLATE_LOADERS = (
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+)
+
 CRISPY_TEMPLATE_PACK = 'bootstrap3'
 
 LOGGING = {'version': 1}
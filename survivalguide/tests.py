@@ -0,0 +1,149 @@
+from __future__ import absolute_import
+
+import unittest
+
+from survivalguide.db import pool
+
+
+class FakeConnection(object):
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeDatabase(object):
+    """Hands out numbered ``FakeConnection``s and pings them."""
+    def __init__(self):
+        self.connections = []
+        self.pings = 0
+
+    def connect(self):
+        connection = FakeConnection(len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+    def ping(self, connection):
+        self.pings += 1
+        if not connection.alive:
+            raise RuntimeError('server closed the connection')
+
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.database = FakeDatabase()
+
+    def make_pool(self, **options):
+        options.setdefault('ping', self.database.ping)
+        return pool.ConnectionPool(**options)
+
+    def test_reuses_released_connection(self):
+        connections = self.make_pool()
+        first = connections.acquire(self.database.connect)
+        connections.release(first)
+        self.assertIs(connections.acquire(self.database.connect), first)
+        self.assertEqual(connections.stats.created, 1)
+        self.assertEqual(connections.stats.reused, 1)
+
+    def test_checkout_times_out_when_every_connection_is_in_use(self):
+        connections = self.make_pool(size=1, timeout=0.05)
+        connections.acquire(self.database.connect)
+        with self.assertRaises(pool.PoolTimeout):
+            connections.acquire(self.database.connect)
+        self.assertEqual(connections.stats.waits, 1)
+        self.assertEqual(connections.stats.timeouts, 1)
+        self.assertEqual(len(self.database.connections), 1)
+
+    def test_failed_connect_frees_its_slot(self):
+        connections = self.make_pool(size=1, timeout=0.05)
+
+        def refuse():
+            raise RuntimeError('could not connect')
+        with self.assertRaises(RuntimeError):
+            connections.acquire(refuse)
+        connections.acquire(self.database.connect)
+        self.assertEqual(connections.summary()['open'], 1)
+
+    def test_recycles_connections_past_max_lifetime(self):
+        connections = self.make_pool()
+        first = connections.acquire(self.database.connect)
+        connections.release(first)
+        connections.max_lifetime = 0
+        second = connections.acquire(self.database.connect)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats.recycled, 1)
+        self.assertEqual(connections.summary()['open'], 1)
+
+    def test_release_closes_expired_connection(self):
+        connections = self.make_pool(max_lifetime=0)
+        first = connections.acquire(self.database.connect)
+        connections.release(first)
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.summary()['idle'], 0)
+
+    def test_replaces_connection_that_fails_ping(self):
+        connections = self.make_pool(ping_after=0)
+        first = connections.acquire(self.database.connect)
+        connections.release(first)
+        first.alive = False
+        second = connections.acquire(self.database.connect)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats.failed_checks, 1)
+        self.assertEqual(connections.summary()['open'], 1)
+
+    def test_skips_ping_for_recently_used_connection(self):
+        connections = self.make_pool(ping_after=60)
+        connections.release(connections.acquire(self.database.connect))
+        connections.acquire(self.database.connect)
+        self.assertEqual(self.database.pings, 0)
+
+    def test_discarded_connection_is_closed(self):
+        connections = self.make_pool()
+        first = connections.acquire(self.database.connect)
+        connections.release(first, discard=True)
+        self.assertTrue(first.closed)
+        self.assertEqual(connections.stats.discarded, 1)
+        self.assertEqual(connections.summary()['open'], 0)
+
+    def test_starts_over_after_fork(self):
+        connections = self.make_pool(size=1)
+        idle = connections.acquire(self.database.connect)
+        connections.release(idle)
+        # As if this process were a child forked after the pool was used.
+        connections._pid = -1
+        fresh = connections.acquire(self.database.connect)
+        self.assertIsNot(fresh, idle)
+        self.assertFalse(idle.closed)
+        # The parent's connection is never handed back to the child's pool.
+        connections.release(idle)
+        self.assertEqual(connections.summary()['idle'], 0)
+
+    def test_close_all_closes_idle_connections(self):
+        connections = self.make_pool()
+        first = connections.acquire(self.database.connect)
+        second = connections.acquire(self.database.connect)
+        connections.release(first)
+        connections.close_all()
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(connections.summary()['open'], 1)
+
+
+class ClosePoolsTest(unittest.TestCase):
+    def tearDown(self):
+        with pool._pools_lock:
+            for key in [key for key in pool._pools if key[0] == 'test']:
+                del pool._pools[key]
+
+    def test_closes_idle_connections_for_alias(self):
+        database = FakeDatabase()
+        connections = pool.get_pool(('test', 'params'), 'test:db')
+        connections.release(connections.acquire(database.connect))
+        pool.close_pools('test')
+        self.assertTrue(database.connections[0].closed)
+        self.assertEqual(connections.summary()['open'], 0)
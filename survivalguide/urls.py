@@ -3,7 +3,8 @@ from __future__ import absolute_import
 from django.conf.urls import patterns, include, url
 from django.contrib import admin
 
-from .views import SignUpView, LoginView, HomePageView, LogoutView
+from .views import (SignUpView, LoginView, HomePageView, LogoutView,
+                    StatsView)
 
 admin.autodiscover()
 
@@ -13,6 +14,7 @@ urlpatterns = patterns(
     url(r'^accounts/register/$', SignUpView.as_view(), name='signup'),
     url(r'^accounts/login/$', LoginView.as_view(), name='login'),
     url(r'^accounts/logout/$', LogoutView.as_view(), name='logout'),
+    url(r'^stats/$', StatsView.as_view(), name='stats'),
     url(r'^admin/', include(admin.site.urls)),
     url(r'^$', HomePageView.as_view(), name='home'),
 )
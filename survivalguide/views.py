@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse_lazy
 from django.views import generic
@@ -9,34 +9,44 @@ from braces import views
 
 from talks.models import TalkList
 
+from . import metrics
+from . import ratelimit
+from .db import pool
 from .forms import RegistrationForm, LoginForm
 
 
-class SignUpView(views.AnonymousRequiredMixin, views.FormValidMessageMixin,
-                 generic.CreateView):
+class SignUpView(views.AnonymousRequiredMixin, ratelimit.RateLimitMixin,
+                 views.FormValidMessageMixin, generic.CreateView):
     form_class = RegistrationForm
     form_valid_message = "Thanks for signing up! Go ahead and login."
     model = User
+    rate_limit = ratelimit.RateLimit('signup')
     success_url = reverse_lazy('login')
     template_name = 'accounts/signup.html'
 
+    def post(self, request, *args, **kwargs):
+        # Set before the rate limit check, which may show the form.
+        self.object = None
+        return super(SignUpView, self).post(request, *args, **kwargs)
+
     def form_valid(self, form):
         resp = super(SignUpView, self).form_valid(form)
         TalkList.objects.create(user=self.object, name='To Attend')
         return resp
 
 
-class LoginView(views.AnonymousRequiredMixin, views.FormValidMessageMixin,
-                generic.FormView):
+class LoginView(views.AnonymousRequiredMixin, ratelimit.RateLimitMixin,
+                views.FormValidMessageMixin, generic.FormView):
     form_class = LoginForm
     form_valid_message = "You're logged into your account."
+    rate_limit = ratelimit.RateLimit('login')
     success_url = reverse_lazy('home')
     template_name = 'accounts/login.html'
 
     def form_valid(self, form):
-        username = form.cleaned_data['username']
-        password = form.cleaned_data['password']
-        user = authenticate(username=username, password=password)
+        # The form authenticated the user while validating; doing it again
+        # would hash the password a second time.
+        user = form.get_user()
 
         if user is not None and user.is_active:
             login(self.request, user)
@@ -57,3 +67,13 @@ class LogoutView(views.LoginRequiredMixin, views.MessageMixin,
         logout(request)
         self.messages.success("You've been logged out. Come back soon!")
         return super(LogoutView, self).get(request, *args, **kwargs)
+
+
+class StatsView(views.StaffuserRequiredMixin, views.JSONResponseMixin,
+                generic.View):
+    def get(self, request, *args, **kwargs):
+        return self.render_json_response({
+            'requests': metrics.request_timings.summary(),
+            'database_pools': pool.summaries(),
+            'rate_limits': metrics.rate_limits.summary(),
+        })
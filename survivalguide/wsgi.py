@@ -13,6 +13,6 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "survivalguide.settings")
 
-from whitenoise.django import DjangoWhiteNoise
+from survivalguide.assets import CompressedWhiteNoise
 
-application = DjangoWhiteNoise(get_wsgi_application())
+application = CompressedWhiteNoise(get_wsgi_application())
@@ -6,9 +6,21 @@ from . import models
 
 
 class TalkListAdmin(admin.ModelAdmin):
-    list_display = ('name', 'user')
+    list_display = ('name', 'user', 'talk_count')
     list_filter = ('user',)
 
 
+class SessionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'host', 'when', 'room')
+    list_filter = ('room',)
+    search_fields = ('name', 'host')
+
+
+class TalkAdmin(admin.ModelAdmin):
+    list_select_related = True
+    raw_id_fields = ('session',)
+
+
 admin.site.register(models.TalkList, TalkListAdmin)
-admin.site.register(models.Talk)
+admin.site.register(models.Session, SessionAdmin)
+admin.site.register(models.Talk, TalkAdmin)
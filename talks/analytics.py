@@ -0,0 +1,87 @@
+"""
+Rating analytics for a user's talks, grouped by list, host and room.
+
+Everything is read from ``RatingRollup``, which holds one count per group,
+category and rating value and is kept current as talks are rated, so a
+report costs two small queries however many talks the user has.
+"""
+from __future__ import absolute_import
+
+import collections
+
+from django.core.urlresolvers import reverse
+from django.utils import six
+
+from . import models
+
+
+RATINGS = range(1, 6)
+
+
+class Summary(object):
+    """The ratings one group of talks got in one category."""
+    def __init__(self):
+        self.counts = collections.Counter()
+
+    @property
+    def count(self):
+        return sum(self.counts.values())
+
+    @property
+    def average(self):
+        count = self.count
+        if not count:
+            return None
+        total = sum(rating * n for rating, n in self.counts.items())
+        return float(total) / count
+
+    @property
+    def distribution(self):
+        """``(rating, count)`` pairs for every possible rating."""
+        return [(rating, self.counts[rating]) for rating in RATINGS]
+
+
+class Group(object):
+    def __init__(self, label, url=None):
+        self.label = label
+        self.url = url
+        self.talk = Summary()
+        self.speaker = Summary()
+
+    @property
+    def summaries(self):
+        return (self.talk, self.speaker)
+
+
+class Dimension(object):
+    def __init__(self, name, groups):
+        self.name = name
+        self.groups = groups
+
+
+def rating_analytics(user):
+    """Return a ``Dimension`` for each of lists, hosts and rooms, with a
+    ``Group`` for every one that has rated talks."""
+    lists = dict((six.text_type(pk), (name, slug)) for pk, name, slug in
+                 user.lists.values_list('pk', 'name', 'slug'))
+    groups = dict((dimension, {})
+                  for dimension, _ in models.RatingRollup.DIMENSION_CHOICES)
+    rows = models.RatingRollup.objects.filter(
+        user=user, count__gt=0).values_list(
+        'dimension', 'key', 'category', 'rating', 'count')
+    for dimension, key, category, rating, count in rows:
+        group = groups[dimension].get(key)
+        if group is None:
+            if dimension == models.RatingRollup.TALK_LIST:
+                if key not in lists:
+                    continue
+                name, slug = lists[key]
+                group = Group(name, reverse('talks:lists:detail',
+                                            kwargs={'slug': slug}))
+            else:
+                group = Group(key)
+            groups[dimension][key] = group
+        getattr(group, category).counts[rating] += count
+    return [Dimension(name, sorted(groups[dimension].values(),
+                                   key=lambda group: group.label.lower()))
+            for dimension, name in models.RatingRollup.DIMENSION_CHOICES]
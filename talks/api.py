@@ -0,0 +1,176 @@
+"""
+Read-only JSON API for lists and talks.
+
+Apart from the delta sync endpoint, every endpoint answers conditional
+GETs. Validators come from a cheap query against ``talks_talklist`` (or
+the single talk row), so an unchanged resource costs a 304 without reading
+the talks in it.
+"""
+from __future__ import absolute_import
+
+import calendar
+import hashlib
+
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponseNotModified
+from django.utils.http import (http_date, parse_etags,
+                               parse_http_date_safe, quote_etag)
+from django.views import generic
+
+from braces import views
+
+from . import models
+from . import pagination
+from . import sync
+
+
+LIST_FIELDS = ('id', 'name', 'slug', 'talk_count', 'updated_at')
+TALK_FIELDS = ('id', 'name', 'slug', 'when', 'room', 'host', 'talk_rating',
+               'speaker_rating', 'updated_at')
+
+
+def epoch(value):
+    """Seconds since the epoch for an aware datetime, or ``None``."""
+    if value is None:
+        return None
+    return calendar.timegm(value.utctimetuple())
+
+
+def make_etag(*parts):
+    return hashlib.md5(
+        u':'.join(u'{0}'.format(part) for part in parts).encode('utf-8')
+    ).hexdigest()
+
+
+def not_modified(request, etag, last_modified):
+    """Whether the client's cached copy, per ``If-None-Match`` or
+    ``If-Modified-Since``, is still current."""
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etag in etags or '*' in etags
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return (if_modified_since is not None and
+            last_modified is not None and
+            last_modified <= if_modified_since)
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = quote_etag(etag)
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalJSONView(views.LoginRequiredMixin, views.JSONResponseMixin,
+                          generic.View):
+    """Answers GETs with ``get_data()`` as JSON, or a 304 when the client's
+    validators still match those from ``get_validators()``."""
+    raise_exception = True
+
+    def get_validators(self):
+        """Return an ``(etag, last_modified)`` pair for the resource."""
+        raise NotImplementedError
+
+    def get_data(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        if self.not_modified(etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = self.render_json_response(self.get_data())
+        return set_validators(response, etag, last_modified)
+
+    def not_modified(self, etag, last_modified):
+        return not_modified(self.request, etag, last_modified)
+
+
+class ListIndexView(ConditionalJSONView):
+    def get_queryset(self):
+        return models.TalkList.objects.filter(user=self.request.user)
+
+    def get_validators(self):
+        state = self.get_queryset().aggregate(count=Count('pk'),
+                                              updated=Max('updated_at'))
+        return (make_etag('lists', state['count'], state['updated']),
+                epoch(state['updated']))
+
+    def get_data(self):
+        return {'lists': list(self.get_queryset().order_by('pk')
+                              .values(*LIST_FIELDS))}
+
+
+class ListDetailView(ConditionalJSONView):
+    """A list and one page of its talks, in schedule order. ``next`` is
+    the ``cursor`` query parameter for the following page, or ``None`` on
+    the last one."""
+    def get(self, request, *args, **kwargs):
+        self.cursor = request.GET.get('cursor', '')
+        if self.cursor:
+            try:
+                pagination.decode_cursor(self.cursor)
+            except pagination.InvalidCursor:
+                return self.render_json_response(
+                    {'error': 'Invalid cursor.'}, status=400)
+        return super(ListDetailView, self).get(request, *args, **kwargs)
+
+    def get_validators(self):
+        try:
+            self.talk_list = models.TalkList.objects.values(
+                *LIST_FIELDS + ('schedule_version',)).get(
+                pk=self.kwargs['pk'], user=self.request.user)
+        except models.TalkList.DoesNotExist:
+            raise Http404
+        return (make_etag('list', self.talk_list['id'],
+                          self.talk_list['schedule_version'],
+                          self.talk_list['updated_at'], self.cursor),
+                epoch(self.talk_list['updated_at']))
+
+    def get_data(self):
+        data = dict((field, self.talk_list[field]) for field in LIST_FIELDS)
+        page = pagination.paginate(
+            models.Talk.objects.filter(talk_list_id=self.talk_list['id'])
+            .defer('notes', 'notes_html', 'notes_hash'), self.cursor)
+        data['talks'] = [dict((field, getattr(talk, field))
+                              for field in TALK_FIELDS) for talk in page]
+        data['next'] = page.next_cursor
+        return data
+
+
+class TalkDetailView(ConditionalJSONView):
+    def get_queryset(self):
+        return models.Talk.objects.filter(pk=self.kwargs['pk'],
+                                          user=self.request.user)
+
+    def get_validators(self):
+        # Only read the timestamp here; the notes can be large.
+        try:
+            updated_at = self.get_queryset().values_list(
+                'updated_at', flat=True).get()
+        except models.Talk.DoesNotExist:
+            raise Http404
+        return (make_etag('talk', self.kwargs['pk'], updated_at),
+                epoch(updated_at))
+
+    def get_data(self):
+        return self.get_queryset().talk_values(
+            *TALK_FIELDS + ('talk_list', 'notes', 'notes_html'))[0]
+
+
+class SyncView(views.LoginRequiredMixin, views.JSONResponseMixin,
+               generic.View):
+    """Lists and talks changed since the ``cursor`` query parameter, which
+    comes from the previous response. See ``talks.sync``."""
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        try:
+            data = sync.changes_since(request.user,
+                                      request.GET.get('cursor'))
+        except sync.InvalidCursor:
+            return self.render_json_response(
+                {'error': 'Invalid cursor.'}, status=400)
+        return self.render_json_response(data)
@@ -0,0 +1,76 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+from __future__ import absolute_import
+
+import contextlib
+import datetime
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+
+from south.management.commands import patch_for_test_db_setup
+
+from . import forms
+from .models import RatingRollup, Session, Talk, TalkList
+
+
+@contextlib.contextmanager
+def test_database(verbosity=0, shared=False):
+    """Run the block against a freshly migrated, throwaway database. The
+    cache is cleared before and after, since cached users and sessions from
+    one database aren't valid in the other.
+
+    SQLite test databases live in memory, where each thread would get its
+    own. Pass ``shared`` to put it in a temporary file every thread sees.
+    """
+    patch_for_test_db_setup()
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict.get('TEST_NAME')
+    if shared and connection.vendor == 'sqlite' and not old_test_name:
+        fd, connection.settings_dict['TEST_NAME'] = tempfile.mkstemp(
+            suffix='.sqlite3')
+        os.close(fd)
+    cache.clear()
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        connection.settings_dict['TEST_NAME'] = old_test_name
+        cache.clear()
+
+
+def create_user_with_talks(username, lists, talks_per_list,
+                           password='password'):
+    """Create a user owning ``lists`` lists of ``talks_per_list`` talks
+    each, spread through PyCon and all rated alike. Returns the user."""
+    user = User.objects.create_user(username, password=password)
+    rooms = [room for room, _ in Talk.ROOM_CHOICES]
+    for list_number in range(lists):
+        talk_list = TalkList.objects.create(
+            user=user, name='List {0}'.format(list_number))
+        keys = [('Talk {0}.{1}'.format(list_number, number),
+                 'Speaker {0}'.format(number),
+                 forms.PYCON_START + datetime.timedelta(
+                     hours=9, minutes=30 * (number % 100)),
+                 rooms[number % len(rooms)])
+                for number in range(talks_per_list)]
+        sessions = Session.objects.resolve(keys)
+        batch = []
+        for number, key in enumerate(keys):
+            talk = Talk(
+                talk_list=talk_list,
+                session=sessions[key],
+                notes='Notes on *talk {0}*'.format(number),
+                talk_rating=3,
+                speaker_rating=3)
+            talk.fill_derived_fields()
+            batch.append(talk)
+        Talk.objects.bulk_create(batch)
+        TalkList.objects.touch([talk_list.pk], added=len(batch))
+    RatingRollup.objects.rebuild(user.pk)
+    return user
@@ -0,0 +1,44 @@
+"""
+Detection of overlapping talks within a list.
+
+Talks don't record an end time, so every talk is assumed to occupy
+``Talk.SLOT_LENGTH`` from its ``when``. Two talks conflict when their slots
+overlap.
+"""
+from __future__ import absolute_import
+
+import collections
+
+
+class Conflict(object):
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def as_dict(self):
+        return {
+            'talks': [{
+                'id': talk.pk,
+                'name': talk.name,
+                'when': talk.when,
+                'room': talk.room,
+                'url': talk.get_absolute_url(),
+            } for talk in (self.first, self.second)],
+        }
+
+
+def find_conflicts(talks, slot_length):
+    """Return a ``Conflict`` for each overlapping pair in ``talks``.
+
+    ``talks`` are sorted by ``(when, room)`` once and swept in order, keeping
+    only the talks still running at the current start time, so the cost is
+    O(n log n) plus the number of conflicts found.
+    """
+    found = []
+    running = collections.deque()
+    for talk in sorted(talks, key=lambda talk: (talk.when, talk.room)):
+        while running and running[0].when + slot_length <= talk.when:
+            running.popleft()
+        found.extend(Conflict(other, talk) for other in running)
+        running.append(talk)
+    return found
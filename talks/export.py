@@ -0,0 +1,100 @@
+"""
+Streaming iCalendar and CSV exports of a ``TalkList``.
+
+Both formats are generated a talk at a time from a ``values_list`` iterator,
+so exporting thousands of talks never builds model instances or the whole
+document in memory. The CSV columns are the ones ``importing`` reads, so an
+export can be imported into another list.
+"""
+from __future__ import absolute_import
+
+import csv
+
+from django.utils import six, timezone
+
+from . import models
+
+
+ICS_FIELDS = ('id', 'name', 'host', 'when', 'room', 'updated_at')
+CSV_FIELDS = ('name', 'host', 'when', 'room', 'notes')
+CSV_WHEN_FORMAT = '%Y-%m-%d %H:%M'
+
+
+def talk_rows(talk_list_id, fields):
+    return (models.Talk.objects.filter(talk_list_id=talk_list_id)
+            .order_by('session_when', 'session_room', 'id')
+            .values_list(*[models.Talk.lookup(field) for field in fields])
+            .iterator())
+
+
+def ics_text(value):
+    """Escape TEXT per RFC 5545."""
+    return (value.replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def ics_time(value):
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def ics_line(line):
+    """Encode a content line, folded to 75 octets per RFC 5545."""
+    folded, current, size = [], [], 0
+    for char in line:
+        octets = len(char.encode('utf-8'))
+        if size + octets > 75:
+            folded.append(u''.join(current))
+            current, size = [u' '], 1
+        current.append(char)
+        size += octets
+    folded.append(u''.join(current))
+    return u'\r\n'.join(folded).encode('utf-8') + b'\r\n'
+
+
+def iter_ics(talk_list_id, calendar_name, domain):
+    """Yield an iCalendar document with one VEVENT per talk."""
+    yield b''.join(ics_line(line) for line in (
+        u'BEGIN:VCALENDAR',
+        u'VERSION:2.0',
+        u'PRODID:-//PyCon Survival Guide//Talks//EN',
+        u'X-WR-CALNAME:{0}'.format(ics_text(calendar_name)),
+    ))
+    for pk, name, host, when, room, updated_at in talk_rows(talk_list_id,
+                                                             ICS_FIELDS):
+        yield b''.join(ics_line(line) for line in (
+            u'BEGIN:VEVENT',
+            u'UID:talk-{0}@{1}'.format(pk, domain),
+            u'DTSTAMP:{0}'.format(ics_time(updated_at)),
+            u'DTSTART:{0}'.format(ics_time(when)),
+            u'DTEND:{0}'.format(ics_time(when + models.Talk.SLOT_LENGTH)),
+            u'SUMMARY:{0}'.format(ics_text(name)),
+            u'LOCATION:{0}'.format(ics_text(room)),
+            u'DESCRIPTION:{0}'.format(ics_text(u'by {0}'.format(host))),
+            u'END:VEVENT',
+        ))
+    yield ics_line(u'END:VCALENDAR')
+
+
+class Echo(object):
+    """A file-like object whose ``write`` just returns what it's given, so
+    ``csv.writer`` can produce one row at a time."""
+    def write(self, value):
+        return value
+
+
+def iter_csv(talk_list_id):
+    """Yield a CSV document, header first, one talk per row."""
+    writer = csv.writer(Echo())
+
+    def row(values):
+        if six.PY2:
+            return writer.writerow([value.encode('utf-8')
+                                    for value in values])
+        return writer.writerow(values).encode('utf-8')
+
+    yield row(CSV_FIELDS)
+    for name, host, when, room, notes in talk_rows(talk_list_id,
+                                                    CSV_FIELDS):
+        yield row([name, host,
+                   timezone.localtime(when).strftime(CSV_WHEN_FORMAT),
+                   room, notes])
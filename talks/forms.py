@@ -28,11 +28,57 @@ class TalkListForm(forms.ModelForm):
         )
 
 
-class TalkForm(forms.ModelForm):
+PYCON_START = datetime.datetime(2014, 4, 11).replace(tzinfo=utc)
+PYCON_END = datetime.datetime(2014, 4, 13, 17).replace(tzinfo=utc)
+
+
+def validate_pycon_when(when):
+    if not PYCON_START < when < PYCON_END:
+        raise ValidationError("'when' is outside of PyCon.")
+
+
+class BaseTalkForm(forms.ModelForm):
+    """Field validation for a talk's schedule details, shared by the add
+    form and the schedule importer."""
     class Meta:
-        fields = ('name', 'host', 'when', 'room')
-        model = models.Talk
+        fields = models.Session.KEY_FIELDS
+        model = models.Session
+
+    def clean_when(self):
+        when = self.cleaned_data.get('when')
+        validate_pycon_when(when)
+        return when
 
+    def validate_unique(self):
+        # A session that's already in the catalog is shared, not an error.
+        pass
+
+    def get_session(self):
+        """The catalog session the form describes, added if it's new."""
+        key = tuple(self.cleaned_data[field]
+                    for field in models.Session.KEY_FIELDS)
+        return models.Session.objects.resolve([key])[key]
+
+    @classmethod
+    def clean_row(cls, data):
+        """Validate ``data`` with the form's fields and ``clean_when``
+        without building a form instance, which is too slow for imports.
+        Returns a ``(cleaned_data, errors)`` pair."""
+        cleaned_data, errors = {}, {}
+        for name, field in cls.base_fields.items():
+            try:
+                cleaned_data[name] = field.clean(data.get(name))
+            except ValidationError as e:
+                errors[name] = e.messages
+        if 'when' in cleaned_data:
+            try:
+                validate_pycon_when(cleaned_data['when'])
+            except ValidationError as e:
+                errors['when'] = e.messages
+        return cleaned_data, errors
+
+
+class TalkForm(BaseTalkForm):
     def __init__(self, *args, **kwargs):
         super(TalkForm, self).__init__(*args, **kwargs)
         self.helper = FormHelper()
@@ -46,14 +92,6 @@ class TalkForm(forms.ModelForm):
             )
         )
 
-    def clean_when(self):
-        when = self.cleaned_data.get('when')
-        pycon_start = datetime.datetime(2014, 4, 11).replace(tzinfo=utc)
-        pycon_end = datetime.datetime(2014, 4, 13, 17).replace(tzinfo=utc)
-        if not pycon_start < when < pycon_end:
-            raise ValidationError("'when' is outside of PyCon.")
-        return when
-
 
 class TalkRatingForm(forms.ModelForm):
     class Meta:
@@ -62,6 +100,10 @@ class TalkRatingForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super(TalkRatingForm, self).__init__(*args, **kwargs)
+        # Validation writes the new ratings onto the instance, so note the
+        # old ones now for the rollup.
+        self.previous_ratings = models.RatingRollup.talk_entries(
+            self.instance)
         self.helper = FormHelper()
         self.helper.layout = Layout(
             'notes',
@@ -75,6 +117,15 @@ class TalkRatingForm(forms.ModelForm):
             )
         )
 
+    def save(self, commit=True):
+        talk = super(TalkRatingForm, self).save(commit=commit)
+        if commit:
+            models.RatingRollup.objects.record(
+                talk.user_id, self.previous_ratings,
+                models.RatingRollup.talk_entries(talk))
+            self.previous_ratings = models.RatingRollup.talk_entries(talk)
+        return talk
+
 
 class TalkTalkListForm(forms.ModelForm):
     class Meta:
@@ -82,9 +133,10 @@ class TalkTalkListForm(forms.ModelForm):
         fields = ('talk_list',)
 
     def __init__(self, *args, **kwargs):
+        user = kwargs.pop('user', None)
         super(TalkTalkListForm, self).__init__(*args, **kwargs)
-        self.fields['talk_list'].queryset = (
-            self.instance.talk_list.user.lists.all())
+        self.fields['talk_list'].queryset = models.TalkList.objects.filter(
+            user_id=user.pk if user else self.instance.user_id)
 
         self.helper = FormHelper()
         self.helper.layout = Layout(
@@ -93,3 +145,19 @@ class TalkTalkListForm(forms.ModelForm):
                 Submit('move', 'Move', css_class='btn-primary')
             )
         )
+
+
+class ScheduleImportForm(forms.Form):
+    schedule = forms.FileField(
+        help_text='A CSV file with name, host, when, room and (optionally) '
+                  'notes columns, or a JSON Lines file with the same keys.')
+
+    def __init__(self, *args, **kwargs):
+        super(ScheduleImportForm, self).__init__(*args, **kwargs)
+        self.helper = FormHelper()
+        self.helper.layout = Layout(
+            'schedule',
+            ButtonHolder(
+                Submit('import', 'Import', css_class='btn-primary')
+            )
+        )
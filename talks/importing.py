@@ -0,0 +1,212 @@
+"""
+Bulk import of conference schedules into a ``TalkList``.
+
+Schedules are read a row at a time from CSV or JSON Lines files, validated
+with the same rules as ``TalkForm`` and written with ``bulk_create`` in
+fixed-size batches, so a large file never has to fit in memory and never
+costs one round trip per talk. Each batch's sessions are looked up in, or
+added to, the shared catalog with a few queries. An import runs in one
+transaction, so an unexpected error part way through leaves the list as
+it was.
+"""
+from __future__ import absolute_import
+
+import codecs
+import csv
+import json
+
+from django.db import transaction
+from django.utils import six
+
+from . import forms
+from . import models
+
+
+FORMATS = ('csv', 'json')
+
+
+def guess_format(filename):
+    """Pick an input format from a file name, defaulting to CSV."""
+    if filename.lower().endswith(('.json', '.jsonl')):
+        return 'json'
+    return 'csv'
+
+
+class InvalidFile(ValueError):
+    """The rest of the file can't be read, e.g. it isn't UTF-8 text."""
+
+
+def _decode(value):
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        raise InvalidFile(u'Not valid UTF-8 text.')
+
+
+def _strip_bom(lines):
+    # Spreadsheet programs often start UTF-8 files with a byte order mark,
+    # which would otherwise end up in the first header.
+    for line_number, line in enumerate(lines):
+        if line_number == 0:
+            if isinstance(line, six.binary_type):
+                if line.startswith(codecs.BOM_UTF8):
+                    line = line[len(codecs.BOM_UTF8):]
+            elif line.startswith(u'\ufeff'):
+                line = line[1:]
+        yield line
+
+
+def _native_lines(lines):
+    # The csv module wants byte strings on Python 2 and text on Python 3.
+    for line in _strip_bom(lines):
+        if six.PY2 and isinstance(line, six.text_type):
+            line = line.encode('utf-8')
+        elif not six.PY2 and isinstance(line, six.binary_type):
+            line = _decode(line)
+        yield line
+
+
+def iter_csv_rows(lines):
+    """Yield one dict per data row of a CSV file with a header row. Raises
+    ``InvalidFile`` at the first line that isn't UTF-8 or that the csv
+    module can't parse, such as the NULs of a UTF-16 file."""
+    reader = csv.DictReader(_native_lines(lines))
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise InvalidFile(u'Not a readable CSV file ({0}).'.format(e))
+        if six.PY2:
+            row = dict((_decode(key), _decode(value or ''))
+                       for key, value in row.items() if key is not None)
+        yield row
+
+
+def iter_json_rows(lines):
+    """Yield one dict per non-blank line of a JSON Lines file, or ``None``
+    for a line that isn't a UTF-8 JSON value."""
+    for line in _strip_bom(lines):
+        if isinstance(line, six.binary_type):
+            try:
+                line = _decode(line)
+            except InvalidFile:
+                yield None
+                continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def iter_rows(lines, format='csv'):
+    if format == 'json':
+        return iter_json_rows(lines)
+    return iter_csv_rows(lines)
+
+
+class ImportResult(object):
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+
+class ScheduleImporter(object):
+    """Validate schedule rows and insert them into ``talk_list`` in batches.
+
+    Rows for a session that's already in the list, or appears earlier in
+    the same file, are reported as errors rather than tripping the
+    ``('talk_list', 'session')`` unique constraint half way through a batch.
+    If the file turns out to be unreadable part way through, the rows before
+    it are kept and the rest is reported as one error.
+    """
+    def __init__(self, talk_list, batch_size=500):
+        self.talk_list = talk_list
+        self.batch_size = batch_size
+
+    def run(self, rows):
+        with transaction.atomic():
+            return self._run(rows)
+
+    def _run(self, rows):
+        result = ImportResult()
+        seen_keys = set(self.talk_list.talks.order_by().values_list(
+            *[models.Talk.lookup(field)
+              for field in models.Session.KEY_FIELDS]))
+        batch = []
+        for row_number, row in self.numbered(rows, result):
+            entry = self.build_talk(row, row_number, result)
+            if entry is None:
+                continue
+            key, notes = entry
+            if key in seen_keys:
+                result.add_error(
+                    row_number, u'{0} is already in {1}.'.format(
+                        key[0], self.talk_list.name))
+                continue
+            seen_keys.add(key)
+            batch.append(entry)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, result)
+                batch = []
+        if batch:
+            self.flush(batch, result)
+        if result.created:
+            models.TalkList.objects.touch([self.talk_list.pk],
+                                          added=result.created)
+        return result
+
+    def numbered(self, rows, result):
+        """Yield ``(row_number, row)`` pairs, stopping with an error at the
+        first ``InvalidFile``."""
+        rows = iter(rows)
+        row_number = 0
+        while True:
+            row_number += 1
+            try:
+                row = next(rows)
+            except StopIteration:
+                return
+            except InvalidFile as e:
+                result.add_error(row_number, u'{0} The rest of the file was '
+                                             u'skipped.'.format(e))
+                return
+            yield row_number, row
+
+    def build_talk(self, row, row_number, result):
+        """Validate ``row`` and return a ``(Session.key, notes)`` pair, or
+        ``None`` if it's invalid."""
+        if not isinstance(row, dict):
+            result.add_error(row_number, u'Expected an object with talk fields.')
+            return None
+        cleaned_data, errors = forms.BaseTalkForm.clean_row(row)
+        if errors:
+            result.add_error(row_number, u'; '.join(
+                u'{0}: {1}'.format(field, u' '.join(messages))
+                for field, messages in sorted(errors.items())))
+            return None
+        notes = row.get('notes') or u''
+        if not isinstance(notes, six.string_types):
+            result.add_error(row_number, u'notes: Expected text.')
+            return None
+        key = tuple(cleaned_data[field]
+                    for field in models.Session.KEY_FIELDS)
+        return key, notes
+
+    def flush(self, batch, result):
+        sessions = models.Session.objects.resolve(key for key, _ in batch)
+        talks = []
+        for key, notes in batch:
+            talk = models.Talk(talk_list=self.talk_list,
+                               session=sessions[key], notes=notes)
+            talk.fill_derived_fields()
+            talks.append(talk)
+        models.Talk.objects.bulk_create(talks)
+        result.created += len(talks)
@@ -0,0 +1,269 @@
+"""
+An offline load test: simulated attendees drive the WSGI application
+concurrently, with no server or network in between.
+
+Each simulated user is a ``Browser``, a cookie jar and a remote address
+that calls ``survivalguide.wsgi.application`` directly, and runs through
+``attendee_journey``: signing up, logging in, creating lists, adding talks,
+rating some of them and viewing each schedule, as a person would in the
+week before PyCon. Requests are timed from the call into the application
+until the last byte of the response body, and grouped by URL name.
+
+SQLite lets one connection write at a time and fails others that try to
+upgrade a read to a write with "database is locked", so concurrent runs
+against it report errors the app wouldn't see on Postgres. Point
+``DATABASE_URL`` at a Postgres server for numbers worth comparing.
+"""
+from __future__ import absolute_import
+
+import collections
+import datetime
+import io
+import random
+import sys
+import threading
+import time
+
+from django.core.urlresolvers import resolve, reverse
+from django.db import connection
+from django.template.defaultfilters import slugify
+from django.utils import six
+from django.utils.six.moves import http_cookies, queue
+from django.utils.six.moves.urllib.parse import urlencode, urlparse
+
+from survivalguide import metrics
+
+from . import forms
+from .models import Talk
+
+
+PASSWORD = 'load-test-password'
+PERCENTILES = (50, 95, 99)
+# Half hour slots from 9:00 to 16:30 on each day of PyCon.
+SLOTS = [forms.PYCON_START + datetime.timedelta(days=day, hours=9,
+                                                minutes=30 * slot)
+         for day in range(3) for slot in range(16)]
+
+
+class JourneyError(Exception):
+    pass
+
+
+class Response(object):
+    def __init__(self, status, headers, content):
+        self.status_code = int(status.split(' ', 1)[0])
+        self.headers = headers
+        self.content = content
+
+    @property
+    def location(self):
+        """The path a redirect points to."""
+        return urlparse(self.headers.get('Location', '')).path
+
+
+class Recorder(object):
+    """Latencies and failures of every request, by URL name, from all of
+    the simulated users' threads."""
+    def __init__(self):
+        self.timings = collections.defaultdict(list)
+        self.errors = collections.Counter()
+        self._lock = threading.Lock()
+
+    def record(self, label, elapsed, failed):
+        with self._lock:
+            self.timings[label].append(elapsed)
+            if failed:
+                self.errors[label] += 1
+
+    def summary(self, duration):
+        """Per label, the request count, errors, requests per second over
+        the whole run of ``duration`` seconds and latency percentiles in
+        milliseconds."""
+        results = {}
+        for label, timings in self.timings.items():
+            timings = sorted(timings)
+            result = {'count': len(timings), 'errors': self.errors[label],
+                      'throughput': len(timings) / duration}
+            for pct in PERCENTILES:
+                result['p{0}'.format(pct)] = (
+                    metrics.percentile(timings, pct) * 1000)
+            results[label] = result
+        return results
+
+
+class Browser(object):
+    """One simulated user calling ``application`` directly. Keeps cookies
+    between requests and sends the CSRF token with every POST."""
+    def __init__(self, application, recorder, remote_addr):
+        self.application = application
+        self.recorder = recorder
+        self.remote_addr = remote_addr
+        self.cookies = http_cookies.SimpleCookie()
+
+    def get(self, path, data=None):
+        return self.request('GET', path, query=urlencode(data or {}))
+
+    def post(self, path, data):
+        data = dict(data)
+        if 'csrftoken' in self.cookies:
+            data['csrfmiddlewaretoken'] = self.cookies['csrftoken'].value
+        return self.request(
+            'POST', path, body=urlencode(data, doseq=True).encode('ascii'),
+            content_type='application/x-www-form-urlencoded')
+
+    def request(self, method, path, query='', body=b'', content_type=''):
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'CONTENT_TYPE': content_type,
+            'CONTENT_LENGTH': str(len(body)),
+            'REMOTE_ADDR': self.remote_addr,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver',
+            'HTTP_COOKIE': self.cookies.output(header='', sep=';').strip(),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        start = time.time()
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        elapsed = time.time() - start
+
+        headers = {}
+        for name, value in started['headers']:
+            if name.lower() == 'set-cookie':
+                self.cookies.load(value)
+            else:
+                headers[name] = value
+        response = Response(started['status'], headers, content)
+        label = '{0} {1}'.format(method, resolve(path).view_name)
+        failed = response.status_code >= 400
+        self.recorder.record(label, elapsed, failed)
+        if failed:
+            raise JourneyError('{0} {1} returned {2}'.format(
+                method, path, response.status_code))
+        return response
+
+
+def catalog_session(number):
+    """The form data for session ``number`` of the simulated catalog.
+    Every user picks from the same catalog, so they share sessions."""
+    return {
+        'name': u'Session {0}'.format(number),
+        'host': u'Speaker {0}'.format(number % 97),
+        'when': SLOTS[number % len(SLOTS)].strftime('%Y-%m-%d %H:%M'),
+        'room': Talk.ROOM_CHOICES[number % len(Talk.ROOM_CHOICES)][0],
+    }
+
+
+def attendee_journey(browser, username, rng, lists=1, talks=10, ratings=3,
+                     catalog_size=200):
+    """Sign up and log in as ``username``, then create ``lists`` lists of
+    ``talks`` talks each, rate ``ratings`` of the talks on each and view
+    each list's schedule. ``rng`` picks the sessions and ratings."""
+    signup, login = reverse('signup'), reverse('login')
+    browser.get(signup)
+    browser.post(signup, {'username': username, 'password1': PASSWORD,
+                          'password2': PASSWORD})
+    browser.get(login)
+    browser.post(login, {'username': username, 'password': PASSWORD})
+
+    # A user can't hold one session twice, or its talk URL would be
+    # ambiguous, so pick them all at once.
+    numbers = rng.sample(range(max(catalog_size, lists * talks)),
+                         lists * talks)
+    create = reverse('talks:lists:create')
+    for list_number in range(lists):
+        browser.get(create)
+        list_url = browser.post(create, {
+            'name': u'Load list {0}'.format(list_number)}).location
+        chosen = [catalog_session(number) for number in
+                  numbers[list_number * talks:(list_number + 1) * talks]]
+        for session in chosen:
+            browser.post(list_url, session)
+        browser.get(list_url)
+        for session in rng.sample(chosen, min(ratings, len(chosen))):
+            talk_url = reverse('talks:talks:detail', kwargs={
+                'list_slug': resolve(list_url).kwargs['slug'],
+                'slug': slugify(session['name'])})
+            browser.get(talk_url)
+            browser.post(talk_url, {
+                'save': 'Save',
+                'notes': u'Notes on *{0}*'.format(session['name']),
+                'talk_rating': rng.randint(1, 5),
+                'speaker_rating': rng.randint(1, 5),
+            })
+        browser.get(reverse('talks:lists:schedule', kwargs=resolve(
+            list_url).kwargs))
+
+
+class LoadTest(object):
+    """Run ``users`` journeys, ``concurrency`` at a time, against
+    ``application``. Each user gets its own remote address and a random
+    generator seeded from ``seed`` and its number, so a run is repeatable
+    apart from thread scheduling."""
+    def __init__(self, application, users=50, concurrency=10, seed=0,
+                 **journey_options):
+        self.application = application
+        self.users = users
+        self.concurrency = concurrency
+        self.seed = seed
+        self.journey_options = journey_options
+        self.recorder = Recorder()
+        self.failures = []
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Run every journey and return the wall clock seconds taken."""
+        pending = queue.Queue()
+        for number in range(self.users):
+            pending.put(number)
+        threads = [threading.Thread(target=self.worker, args=(pending,))
+                   for _ in range(self.concurrency)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.time() - start
+
+    def worker(self, pending):
+        try:
+            while True:
+                try:
+                    number = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self.simulate(number)
+        finally:
+            connection.close()
+
+    def simulate(self, number):
+        browser = Browser(self.application, self.recorder,
+                          '10.{0}.{1}.{2}'.format(number // 65536 % 256,
+                                                  number // 256 % 256,
+                                                  number % 256))
+        rng = random.Random(self.seed * 1000003 + number)
+        try:
+            attendee_journey(browser, 'load-{0}'.format(number), rng,
+                             **self.journey_options)
+        except JourneyError as e:
+            with self._lock:
+                self.failures.append(six.text_type(e))
@@ -0,0 +1,83 @@
+from __future__ import absolute_import
+
+import datetime
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from talks import forms, importing
+from talks.models import Talk, TalkList
+
+
+class Rollback(Exception):
+    pass
+
+
+def synthetic_schedule(rows):
+    """Yield CSV lines for ``rows`` distinct talks inside PyCon."""
+    yield b'name,host,when,room,notes\n'
+    rooms = [room for room, _ in Talk.ROOM_CHOICES]
+    span = int((forms.PYCON_END - forms.PYCON_START).total_seconds()) - 60
+    for i in range(rows):
+        when = forms.PYCON_START + datetime.timedelta(
+            seconds=60 + (i * 97) % span)
+        yield (u'Talk {0},Speaker {1},{2:%Y-%m-%d %H:%M},{3},'
+               u'"Notes for *talk {0}*"\n').format(
+            i, i % 400, when, rooms[i % len(rooms)]).encode('utf-8')
+
+
+class Command(BaseCommand):
+    help = ('Time a bulk schedule import of synthetic rows. Everything is '
+            'rolled back afterwards.')
+    option_list = BaseCommand.option_list + (
+        make_option('--rows', type='int', default=10000),
+        make_option('--batch-size', type='int', default=500),
+        make_option('--compare', action='store_true', default=False,
+                    help='Also time saving the same rows one at a time.'),
+    )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        self.report('bulk import', rows,
+                    self.time_import(rows, options['batch_size']))
+        if options['compare']:
+            self.report('Talk.save per row', rows, self.time_saves(rows))
+
+    def report(self, label, rows, seconds):
+        self.stdout.write('{0}: {1} rows in {2:.2f}s ({3:.0f} rows/s)'.format(
+            label, rows, seconds, rows / seconds))
+
+    def time_import(self, rows, batch_size):
+        def run(talk_list):
+            importer = importing.ScheduleImporter(talk_list, batch_size)
+            result = importer.run(importing.iter_csv_rows(
+                synthetic_schedule(rows)))
+            assert result.created == rows, result.errors[:5]
+        return self.timed(run)
+
+    def time_saves(self, rows):
+        def run(talk_list):
+            for row in importing.iter_csv_rows(synthetic_schedule(rows)):
+                form = forms.TalkForm(row)
+                assert form.is_valid(), form.errors
+                Talk.objects.create(talk_list=talk_list,
+                                    session=form.get_session(),
+                                    notes=row['notes'])
+        return self.timed(run)
+
+    def timed(self, run):
+        elapsed = None
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username='bench-import')
+                talk_list = TalkList.objects.create(user=user, name='Bench')
+                start = time.time()
+                run(talk_list)
+                elapsed = time.time() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return elapsed
@@ -0,0 +1,74 @@
+from __future__ import absolute_import
+
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+from django.core.urlresolvers import reverse
+from django.test import Client
+from django.test.utils import override_settings
+
+from talks import benchmarks
+
+
+UNCACHED_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+
+
+class Command(BaseCommand):
+    help = ('Time rendering the detail page of a large list and of one of '
+            'its talks, in a throwaway database.')
+    option_list = BaseCommand.option_list + (
+        make_option('--talks', type='int', default=500,
+                    help='Number of talks in the list.'),
+        make_option('--repeat', type='int', default=20,
+                    help='Requests timed per page.'),
+        make_option('--compare', action='store_true', default=False,
+                    help='Also time the pages with uncached template '
+                         'loaders and no partial memoization.'),
+    )
+
+    def handle(self, *args, **options):
+        with benchmarks.test_database():
+            user = benchmarks.create_user_with_talks(
+                'bench-templates', lists=1, talks_per_list=options['talks'])
+            client = Client()
+            client.login(username=user.username, password='password')
+            talk_list = user.lists.get()
+            pages = (
+                ('list detail', reverse('talks:lists:detail',
+                                        kwargs={'slug': talk_list.slug})),
+                ('talk detail', reverse(
+                    'talks:talks:detail',
+                    kwargs={'list_slug': talk_list.slug,
+                            'slug': talk_list.talks.all()[0].slug})),
+            )
+            runs = [('cached', {})]
+            if options['compare']:
+                runs.append(('uncached', {'TEMPLATE_LOADERS': UNCACHED_LOADERS,
+                                          'TALKS_RENDER_CACHE': False}))
+            for label, url in pages:
+                for run, overrides in runs:
+                    with override_settings(DEBUG=False, TEMPLATE_DEBUG=False,
+                                           **overrides):
+                        timings = self.time_page(client, url,
+                                                 options['repeat'])
+                    self.report('{0} ({1})'.format(label, run), timings)
+
+    def time_page(self, client, url, repeat):
+        # One untimed request so the cached run starts warm, as a
+        # long-running worker would be.
+        client.get(url)
+        timings = []
+        for _ in range(repeat):
+            start = time.time()
+            response = client.get(url)
+            timings.append(time.time() - start)
+            assert response.status_code == 200, response.status_code
+        return sorted(timings)
+
+    def report(self, label, timings):
+        self.stdout.write('{0:<24} median {1:>7.1f}ms  min {2:>7.1f}ms'.format(
+            label, timings[len(timings) // 2] * 1000, timings[0] * 1000))
@@ -0,0 +1,241 @@
+"""
+Run every named URL in the project against synthetic data of growing size
+and fail if any view's query count exceeds its budget or grows with the
+amount of data. The admin and debug toolbar are not covered.
+
+Budgets are counted on SQLite, which logs a ``BEGIN`` before each write.
+Sessions and users come from the cache, so a logged-in request starts at
+zero queries.
+"""
+from __future__ import absolute_import
+
+import datetime
+import itertools
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import (RegexURLResolver, get_resolver,
+                                      reverse)
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from talks import benchmarks
+from talks import pagination
+from talks import sync
+
+
+class Check(object):
+    """One request to measure. ``kwargs`` builds the URL arguments and
+    ``data`` the POST body from the user's data, described by a
+    ``Fixture``."""
+    def __init__(self, url_name, budget, method='get', kwargs=None,
+                 data=None, anonymous=False):
+        self.url_name = url_name
+        self.budget = budget
+        self.method = method
+        self.kwargs = kwargs or (lambda fixture: {})
+        self.data = data or (lambda fixture: {})
+        self.anonymous = anonymous
+
+    @property
+    def label(self):
+        return '{0} {1}'.format(self.method.upper(), self.url_name)
+
+
+class Measurement(object):
+    def __init__(self, queries, elapsed):
+        self.queries = queries
+        self.count = len(queries)
+        self.elapsed = elapsed
+
+
+class Fixture(object):
+    def __init__(self, user):
+        self.user = user
+        self.talk_list = user.lists.order_by('pk')[0]
+        self.other_list = user.lists.order_by('-pk')[0]
+        self.talk = self.talk_list.talks.order_by('-pk')[0]
+
+
+def list_slug(fixture):
+    return {'slug': fixture.talk_list.slug}
+
+
+def talk_slugs(fixture):
+    return {'list_slug': fixture.talk_list.slug, 'slug': fixture.talk.slug}
+
+
+def second_page(fixture):
+    # Seek past the list's first talk, as if it ended the first page.
+    return {'cursor': pagination.encode_cursor(
+        fixture.talk_list.talks.order_by(*pagination.ORDERING)[0])}
+
+
+CHECKS = (
+    Check('home', 0),
+    Check('signup', 0, anonymous=True),
+    Check('login', 0, anonymous=True),
+    Check('logout', 8),
+    Check('stats', 0),
+    Check('talks:lists:list', 1),
+    Check('talks:lists:create', 0),
+    Check('talks:lists:detail', 4, kwargs=list_slug),
+    Check('talks:lists:detail', 4, kwargs=list_slug, data=second_page),
+    Check('talks:lists:detail', 11, method='post', kwargs=list_slug,
+          # A session new to the catalog, the most work an add can be.
+          data=lambda fixture: {'name': u'Budget talk {0}'.format(
+                                    fixture.user.username),
+                                'host': 'Someone',
+                                'when': '2014-04-12 10:00', 'room': '520'}),
+    Check('talks:lists:schedule', 3, kwargs=list_slug),
+    Check('talks:lists:conflicts', 2, kwargs=list_slug),
+    Check('talks:lists:update', 1, kwargs=list_slug),
+    Check('talks:lists:import', 1, kwargs=list_slug),
+    Check('talks:lists:export', 2,
+          kwargs=lambda fixture: {'slug': fixture.talk_list.slug,
+                                  'format': 'ics'}),
+    Check('talks:lists:export', 2,
+          kwargs=lambda fixture: {'slug': fixture.talk_list.slug,
+                                  'format': 'csv'}),
+    Check('talks:lists:calendar', 2, anonymous=True,
+          kwargs=lambda fixture: {
+              'token': fixture.talk_list.calendar_token}),
+    Check('talks:lists:bulk_remove', 13, method='post', kwargs=list_slug,
+          data=lambda fixture: {'talks': [
+              talk.pk for talk in fixture.talk_list.talks.all()]}),
+    Check('talks:lists:bulk_move', 15, method='post', kwargs=list_slug,
+          data=lambda fixture: {
+              'talks': [talk.pk for talk in fixture.talk_list.talks.all()],
+              'talk_list': fixture.other_list.pk}),
+    Check('talks:lists:remove_talk', 6,
+          kwargs=lambda fixture: {'talklist_pk': fixture.talk_list.pk,
+                                  'pk': fixture.talk.pk}),
+    Check('talks:talks:detail', 2, kwargs=talk_slugs),
+    Check('talks:talks:search', 3, data=lambda fixture: {'q': 'talk'}),
+    Check('talks:talks:ratings', 2),
+    Check('talks:api:lists', 2),
+    Check('talks:api:list', 2,
+          kwargs=lambda fixture: {'pk': fixture.talk_list.pk}),
+    Check('talks:api:list', 2,
+          kwargs=lambda fixture: {'pk': fixture.talk_list.pk},
+          data=second_page),
+    Check('talks:api:talk', 2,
+          kwargs=lambda fixture: {'pk': fixture.talk.pk}),
+    Check('talks:api:sync', 2),
+    Check('talks:api:sync', 3,
+          data=lambda fixture: {'cursor': sync.encode_cursor(
+              timezone.now() - datetime.timedelta(minutes=1))}),
+    Check('talks:talks:detail', 11, method='post', kwargs=talk_slugs,
+          data=lambda fixture: {'save': 'Save', 'notes': 'Good *talk*',
+                                'talk_rating': 4, 'speaker_rating': 5}),
+    Check('talks:talks:detail', 13, method='post', kwargs=talk_slugs,
+          data=lambda fixture: {'move': 'Move',
+                                'talk_list': fixture.other_list.pk}),
+)
+
+
+SKIPPED_NAMESPACES = ('admin', 'djdt')
+
+
+def url_names(patterns, namespace=None):
+    """Yield the fully namespaced name of every named, non-admin URL."""
+    for pattern in patterns:
+        if isinstance(pattern, RegexURLResolver):
+            if pattern.namespace in SKIPPED_NAMESPACES:
+                continue
+            child_namespace = pattern.namespace
+            if namespace and child_namespace:
+                child_namespace = '{0}:{1}'.format(namespace,
+                                                   child_namespace)
+            for name in url_names(pattern.url_patterns,
+                                  child_namespace or namespace):
+                yield name
+        elif pattern.name:
+            if namespace:
+                yield '{0}:{1}'.format(namespace, pattern.name)
+            else:
+                yield pattern.name
+
+
+class Command(BaseCommand):
+    help = ('Check every view against its query budget on growing '
+            'synthetic datasets.')
+    option_list = BaseCommand.option_list + (
+        make_option('--sizes', default='2,10,40',
+                    help='Comma separated dataset sizes. A size of N '
+                         'creates N lists of N talks.'),
+        make_option('--show-sql', action='store_true', default=False,
+                    help='Print the queries of views that fail.'),
+    )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        missing = (set(url_names(get_resolver(None).url_patterns)) -
+                   set(check.url_name for check in CHECKS))
+        if missing:
+            raise CommandError('No query budget for: {0}'.format(
+                ', '.join(sorted(missing))))
+
+        with benchmarks.test_database():
+            results = dict((check, []) for check in CHECKS)
+            usernames = ('budget-{0}'.format(n) for n in itertools.count())
+            for size in sizes:
+                for check in CHECKS:
+                    # Every check gets fresh data so writes can't leak
+                    # into the next measurement.
+                    user = benchmarks.create_user_with_talks(
+                        next(usernames), lists=size, talks_per_list=size)
+                    results[check].append(self.measure(check, user))
+
+        failures = self.report(sizes, results, options['show_sql'])
+        if failures:
+            raise CommandError('\n'.join(failures))
+
+    def measure(self, check, user):
+        client = Client()
+        if not check.anonymous:
+            client.login(username=user.username, password='password')
+        fixture = Fixture(user)
+        url = reverse(check.url_name, kwargs=check.kwargs(fixture))
+        data = check.data(fixture)
+        # Time the views as production runs them, without the debug toolbar.
+        with override_settings(DEBUG=False, TEMPLATE_DEBUG=False):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.time()
+                response = getattr(client, check.method)(url, data)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.time() - start
+        if response.status_code >= 400:
+            raise CommandError('{0} returned {1}'.format(
+                check.label, response.status_code))
+        return Measurement(queries.captured_queries, elapsed)
+
+    def report(self, sizes, results, show_sql=False):
+        failures = []
+        self.stdout.write('{0:<36} {1:>6}  {2}'.format(
+            'view', 'budget', '  '.join(
+                'n={0:<4} q   ms'.format(size) for size in sizes)))
+        for check in CHECKS:
+            measurements = results[check]
+            self.stdout.write('{0:<36} {1:>6}  {2}'.format(
+                check.label, check.budget, '  '.join(
+                    '{0:>8} {1:>5.1f}'.format(measurement.count,
+                                              measurement.elapsed * 1000)
+                    for measurement in measurements)))
+            counts = [measurement.count for measurement in measurements]
+            failed = len(failures)
+            if max(counts) > check.budget:
+                failures.append('{0} ran {1} queries, over its budget of '
+                                '{2}.'.format(check.label, max(counts),
+                                              check.budget))
+            if len(set(counts)) > 1:
+                failures.append('{0} query count grows with data: '
+                                '{1}.'.format(check.label, counts))
+            if show_sql and len(failures) > failed:
+                for query in measurements[-1].queries:
+                    self.stdout.write('    {0}'.format(query['sql']))
+        return failures
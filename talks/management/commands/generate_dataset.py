@@ -0,0 +1,186 @@
+from __future__ import absolute_import
+
+import collections
+import datetime
+import random
+import time
+from optparse import make_option
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.defaultfilters import slugify
+
+from talks import forms
+from talks.models import RatingRollup, Session, Talk, TalkList
+
+
+WORDS = (
+    'async', 'python', 'django', 'testing', 'data', 'packaging', 'web',
+    'security', 'performance', 'typing', 'community', 'teaching', 'science',
+    'api', 'database', 'cache', 'deploy', 'debugging', 'concurrency',
+    'machine', 'learning', 'library', 'tooling', 'design', 'patterns',
+    'scaling', 'profiling', 'memory', 'network', 'hardware', 'music',
+    'games', 'maps', 'documentation', 'accessibility', 'open', 'source',
+)
+TITLE_FORMS = (
+    u'{0} for {1}', u'Practical {0}', u'{0} and {1} at Scale',
+    u'Beyond {0}', u'A Tour of {0}', u'What {0} Taught Us About {1}',
+)
+FIRST_NAMES = ('Ada', 'Alex', 'Ana', 'Chen', 'Dana', 'Emeka', 'Farah',
+               'Guido', 'Hiro', 'Ines', 'Jun', 'Kofi', 'Lena', 'Maya',
+               'Noor', 'Omar', 'Priya', 'Raj', 'Sam', 'Tariq', 'Yuki')
+LAST_NAMES = ('Adeyemi', 'Brown', 'Costa', 'Dubois', 'Eriksen', 'Garcia',
+              'Ito', 'Kim', 'Kowalski', 'Li', 'Moreau', 'Nakamura', 'Okafor',
+              'Patel', 'Rossi', 'Silva', 'Smith', 'Tanaka', 'Wong')
+LIST_NAMES = ('To Attend', 'Maybe', 'Must See', 'Hallway Track',
+              'Tutorials', 'Watch Later')
+# Talks start on the quarter hour between 9:00 and 16:45 each day.
+SLOTS = [forms.PYCON_START + datetime.timedelta(days=day, hours=9,
+                                                minutes=15 * slot)
+         for day in range(3) for slot in range(32)]
+
+
+def markdown_notes(rng, words):
+    """About ``words`` words of notes: paragraphs with some emphasis and
+    code, and now and then a bulleted list."""
+    paragraphs = []
+    remaining = words
+    while remaining > 0:
+        length = min(remaining, rng.randint(15, 60))
+        remaining -= length
+        chosen = [rng.choice(WORDS) for _ in range(length)]
+        for i in range(len(chosen)):
+            roll = rng.random()
+            if roll < 0.04:
+                chosen[i] = u'*{0}*'.format(chosen[i])
+            elif roll < 0.06:
+                chosen[i] = u'`{0}()`'.format(chosen[i])
+        if rng.random() < 0.25:
+            paragraphs.append(u'\n'.join(
+                u'- {0}'.format(u' '.join(chosen[i:i + 6]))
+                for i in range(0, len(chosen), 6)))
+        else:
+            paragraphs.append(u' '.join(chosen).capitalize() + u'.')
+    return u'\n\n'.join(paragraphs)
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with synthetic users, lists and talks for '
+            'benchmarking. The same options and seed give the same data.')
+    option_list = BaseCommand.option_list + (
+        make_option('--users', type='int', default=100),
+        make_option('--lists', type='int', default=3,
+                    help='Lists per user.'),
+        make_option('--talks', type='int', default=20,
+                    help='Talks per list.'),
+        make_option('--sessions', type='int', default=1000,
+                    help='Size of the session catalog the talks come from.'),
+        make_option('--notes-words', type='int', default=80,
+                    help='Length of each talk\'s markdown notes, in words.'),
+        make_option('--seed', type='int', default=0),
+        make_option('--prefix', default='synthetic',
+                    help='Usernames are PREFIX-0, PREFIX-1 and so on.'),
+        make_option('--password', default='password'),
+        make_option('--chunk-size', type='int', default=500,
+                    help='Rows per bulk INSERT.'),
+    )
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.chunk_size = options['chunk_size']
+        talks_per_user = options['lists'] * options['talks']
+        if talks_per_user > options['sessions']:
+            raise CommandError('--sessions must be at least --lists times '
+                               '--talks, so no user holds a session twice.')
+        if User.objects.filter(
+                username__startswith=options['prefix'] + '-').exists():
+            raise CommandError('Users named {0}-N already exist; pick another '
+                               '--prefix.'.format(options['prefix']))
+
+        start = time.time()
+        rng = random.Random(options['seed'])
+        catalog = self.create_catalog(rng, options['sessions'])
+        # Hash once with a seeded salt; hashing per user would dominate.
+        password = make_password(options['password'],
+                                 salt='{0}{1}'.format(options['prefix'],
+                                                      options['seed']))
+        users_per_batch = max(1, self.chunk_size // max(1, talks_per_user))
+        created = collections.Counter()
+        for first in range(0, options['users'], users_per_batch):
+            numbers = range(first, min(first + users_per_batch,
+                                       options['users']))
+            with transaction.atomic():
+                self.create_users(rng, numbers, password, catalog, created)
+        self.stdout.write(
+            'Created {0[users]} users, {0[lists]} lists and {0[talks]} talks '
+            'from {1} sessions in {2:.1f}s.'.format(
+                created, len(catalog), time.time() - start))
+
+    def create_catalog(self, rng, size):
+        keys = []
+        for number in range(size):
+            title = rng.choice(TITLE_FORMS).format(
+                *[rng.choice(WORDS).capitalize() for _ in range(2)])
+            keys.append((
+                u'{0} ({1})'.format(title, number),
+                u'{0} {1}'.format(rng.choice(FIRST_NAMES),
+                                  rng.choice(LAST_NAMES)),
+                rng.choice(SLOTS),
+                rng.choice(Talk.ROOM_CHOICES)[0],
+            ))
+        sessions = {}
+        for first in range(0, size, self.chunk_size):
+            with transaction.atomic():
+                sessions.update(Session.objects.resolve(
+                    keys[first:first + self.chunk_size]))
+        return [sessions[key] for key in keys]
+
+    def create_users(self, rng, numbers, password, catalog, created):
+        options = self.options
+        usernames = ['{0}-{1}'.format(options['prefix'], number)
+                     for number in numbers]
+        User.objects.bulk_create([User(username=username, password=password)
+                                  for username in usernames])
+        users = list(User.objects.filter(username__in=usernames)
+                     .order_by('pk'))
+
+        names = [LIST_NAMES[number] if number < len(LIST_NAMES)
+                 else u'List {0}'.format(number)
+                 for number in range(options['lists'])]
+        TalkList.objects.bulk_create([
+            TalkList(user=user, name=name, slug=slugify(name),
+                     talk_count=options['talks'],
+                     calendar_token='{0:032x}'.format(rng.getrandbits(128)))
+            for user in users for name in names
+        ], batch_size=self.chunk_size)
+        talk_lists = collections.defaultdict(list)
+        for talk_list in TalkList.objects.filter(
+                user__in=users).order_by('pk'):
+            talk_lists[talk_list.user_id].append(talk_list)
+
+        talks, rollups = [], []
+        for user in users:
+            sessions = rng.sample(catalog, len(names) * options['talks'])
+            counts = collections.Counter()
+            for i, session in enumerate(sessions):
+                rated = rng.random() < 0.4
+                talk = Talk(
+                    talk_list=talk_lists[user.pk][i // options['talks']],
+                    session=session,
+                    talk_rating=rng.randint(1, 5) if rated else 0,
+                    speaker_rating=rng.randint(1, 5) if rated else 0,
+                    notes=markdown_notes(rng, options['notes_words']))
+                talk.fill_derived_fields()
+                talks.append(talk)
+                counts.update(RatingRollup.talk_entries(talk))
+            rollups.extend(
+                RatingRollup(user=user, dimension=dimension, key=key,
+                             category=category, rating=rating, count=count)
+                for (dimension, key, category, rating), count
+                in counts.items())
+        Talk.objects.bulk_create(talks, batch_size=self.chunk_size)
+        RatingRollup.objects.bulk_create(rollups, batch_size=self.chunk_size)
+        created.update(users=len(usernames),
+                       lists=len(usernames) * len(names), talks=len(talks))
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+
+import io
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from talks import importing
+from talks.models import TalkList
+
+
+class Command(BaseCommand):
+    args = '<username> <list name> <schedule file>'
+    help = 'Import a CSV or JSON Lines schedule into one of a user\'s lists.'
+    option_list = BaseCommand.option_list + (
+        make_option('--format', choices=importing.FORMATS,
+                    help='Input format. Guessed from the file name if '
+                         'omitted.'),
+        make_option('--batch-size', type='int', default=500,
+                    help='Number of talks inserted per statement.'),
+        make_option('--create-list', action='store_true', default=False,
+                    help='Create the list if the user does not have it.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 3:
+            raise CommandError('Usage: import_schedule {0}'.format(self.args))
+        username, list_name, path = args
+
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError('No user named {0!r}.'.format(username))
+
+        if options['create_list']:
+            talk_list, _ = TalkList.objects.get_or_create(
+                user=user, name=list_name)
+        else:
+            try:
+                talk_list = user.lists.get(name=list_name)
+            except TalkList.DoesNotExist:
+                raise CommandError(
+                    '{0} has no list named {1!r}.'.format(username, list_name))
+
+        format = options['format'] or importing.guess_format(path)
+        importer = importing.ScheduleImporter(
+            talk_list, batch_size=options['batch_size'])
+        with io.open(path, 'rb') as schedule:
+            result = importer.run(importing.iter_rows(schedule, format))
+
+        for row_number, message in result.errors:
+            self.stderr.write(u'Row {0}: {1}'.format(row_number, message))
+        self.stdout.write('Imported {0} talks into {1}.'.format(
+            result.created, talk_list.name))
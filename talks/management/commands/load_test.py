@@ -0,0 +1,119 @@
+from __future__ import absolute_import
+
+import json
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from talks import benchmarks
+from talks import loadtest
+
+
+class Command(BaseCommand):
+    help = ('Load test the WSGI application with concurrent simulated '
+            'attendees, in a throwaway database, and report throughput and '
+            'latency percentiles per URL name.')
+    option_list = BaseCommand.option_list + (
+        make_option('--users', type='int', default=50,
+                    help='Simulated users, each running one journey.'),
+        make_option('--concurrency', type='int', default=10,
+                    help='Users running at once, one thread each.'),
+        make_option('--lists', type='int', default=1,
+                    help='Lists each user creates.'),
+        make_option('--talks', type='int', default=10,
+                    help='Talks each user adds to each list.'),
+        make_option('--ratings', type='int', default=3,
+                    help='Talks each user rates on each list.'),
+        make_option('--catalog-size', type='int', default=200,
+                    help='Sessions the users pick their talks from.'),
+        make_option('--seed', type='int', default=0),
+        make_option('--save-baseline', metavar='FILE',
+                    help='Write the results to FILE as JSON.'),
+        make_option('--baseline', metavar='FILE',
+                    help='Compare against results saved with '
+                         '--save-baseline.'),
+        make_option('--tolerance', type='float', default=20.0,
+                    help='Percent p95 latency may grow over the baseline '
+                         'before the run fails.'),
+    )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        # Imported here since loading the WSGI module configures Django.
+        from survivalguide.wsgi import application
+        test = loadtest.LoadTest(
+            application, users=options['users'],
+            concurrency=options['concurrency'], seed=options['seed'],
+            lists=options['lists'], talks=options['talks'],
+            ratings=options['ratings'],
+            catalog_size=options['catalog_size'])
+        # Time the views as production runs them, without the debug toolbar.
+        with benchmarks.test_database(shared=True):
+            with override_settings(DEBUG=False, TEMPLATE_DEBUG=False):
+                duration = test.run()
+
+        results = {
+            'options': dict((name, options[name]) for name in (
+                'users', 'concurrency', 'lists', 'talks', 'ratings',
+                'catalog_size', 'seed')),
+            'duration': duration,
+            'throughput': sum(len(timings) for timings in
+                              test.recorder.timings.values()) / duration,
+            'requests': test.recorder.summary(duration),
+        }
+        self.report(results, baseline)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if test.failures:
+            self.stderr.write('{0} of {1} journeys failed, first with: '
+                              '{2}'.format(len(test.failures),
+                                           options['users'],
+                                           test.failures[0]))
+        if baseline is not None:
+            regressions = self.regressions(results, baseline,
+                                           options['tolerance'])
+            if regressions:
+                raise CommandError('\n'.join(regressions))
+
+    def report(self, results, baseline=None):
+        self.stdout.write('{0} journeys in {1:.1f}s, {2:.1f} requests/s'.format(
+            results['options']['users'], results['duration'],
+            results['throughput']))
+        self.stdout.write('{0:<36} {1:>6} {2:>6} {3:>7} {4:>8} {5:>8} '
+                          '{6:>8}{7}'.format(
+                              'request', 'count', 'errors', 'req/s', 'p50 ms',
+                              'p95 ms', 'p99 ms',
+                              '  p95 vs baseline' if baseline else ''))
+        for label, result in sorted(results['requests'].items()):
+            line = ('{0:<36} {1[count]:>6} {1[errors]:>6} '
+                    '{1[throughput]:>7.1f} {1[p50]:>8.1f} {1[p95]:>8.1f} '
+                    '{1[p99]:>8.1f}').format(label, result)
+            before = (baseline or {}).get('requests', {}).get(label)
+            if before:
+                line += '  {0:>+15.0f}%'.format(
+                    (result['p95'] / before['p95'] - 1) * 100)
+            self.stdout.write(line)
+
+    def regressions(self, results, baseline, tolerance):
+        if baseline['options'] != results['options']:
+            self.stderr.write('The baseline was run with different options: '
+                              '{0}'.format(baseline['options']))
+        found = []
+        for label, result in sorted(results['requests'].items()):
+            before = baseline['requests'].get(label)
+            if not before:
+                continue
+            if result['p95'] > before['p95'] * (1 + tolerance / 100.0):
+                found.append('{0} p95 is {1:.1f}ms, up from {2:.1f}ms.'.format(
+                    label, result['p95'], before['p95']))
+            if result['errors'] > before['errors']:
+                found.append('{0} failed {1} times, up from {2}.'.format(
+                    label, result['errors'], before['errors']))
+        return found
@@ -0,0 +1,14 @@
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand
+
+from talks import sync
+
+
+class Command(BaseCommand):
+    help = ('Delete sync tombstones older than TALKS_TOMBSTONE_DAYS. '
+            'Clients with older cursors get a full resync.')
+
+    def handle(self, *args, **options):
+        pruned = sync.prune_tombstones()
+        self.stdout.write('Pruned {0} tombstones.'.format(pruned))
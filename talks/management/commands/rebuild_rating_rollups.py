@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from talks.models import RatingRollup
+
+
+class Command(BaseCommand):
+    help = ("Recount every user's rating rollups from their talks, fixing "
+            "any drift.")
+
+    def handle(self, *args, **options):
+        user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+        rebuilt = 0
+        for user_id in user_ids.iterator():
+            RatingRollup.objects.rebuild(user_id)
+            rebuilt += 1
+        self.stdout.write('Rebuilt rating rollups for {0} users.'.format(
+            rebuilt))
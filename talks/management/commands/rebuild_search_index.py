@@ -0,0 +1,16 @@
+from __future__ import absolute_import
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from talks import search
+
+
+class Command(BaseCommand):
+    help = ('Recreate the talk search index and its triggers if missing, '
+            'then reindex every talk.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.install(rebuild=True)
+        self.stdout.write('Rebuilt the talk search index.')
@@ -0,0 +1,20 @@
+from __future__ import absolute_import
+
+from optparse import make_option
+
+from django.core.management.base import BaseCommand
+
+from talks.models import TalkList
+
+
+class Command(BaseCommand):
+    help = 'Recount the talks in every list and fix any drifted talk_count.'
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', type='int', default=500,
+                    help='Number of lists recounted per query.'),
+    )
+
+    def handle(self, *args, **options):
+        repaired = TalkList.objects.reconcile_talk_counts(
+            batch_size=options['batch_size'])
+        self.stdout.write('Repaired talk_count on {0} lists.'.format(repaired))
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+SQLITE_FORWARDS = (
+    """CREATE VIRTUAL TABLE talks_talk_fts USING fts5(
+        name, host, notes, content='talks_talk', content_rowid='id',
+        tokenize='porter unicode61')""",
+    """CREATE TRIGGER talks_talk_fts_insert AFTER INSERT ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        VALUES (new.id, new.name, new.host, new.notes);
+    END""",
+    """CREATE TRIGGER talks_talk_fts_delete AFTER DELETE ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        VALUES ('delete', old.id, old.name, old.host, old.notes);
+    END""",
+    """CREATE TRIGGER talks_talk_fts_update
+        AFTER UPDATE OF name, host, notes ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        VALUES ('delete', old.id, old.name, old.host, old.notes);
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        VALUES (new.id, new.name, new.host, new.notes);
+    END""",
+    "INSERT INTO talks_talk_fts (talks_talk_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARDS = (
+    "DROP TRIGGER talks_talk_fts_insert",
+    "DROP TRIGGER talks_talk_fts_delete",
+    "DROP TRIGGER talks_talk_fts_update",
+    "DROP TABLE talks_talk_fts",
+)
+
+POSTGRES_FORWARDS = (
+    "ALTER TABLE talks_talk ADD COLUMN search_vector tsvector",
+    """CREATE FUNCTION talks_talk_search_vector() RETURNS trigger AS $$ BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.host, '')), 'B') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.notes, '')), 'C');
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER talks_talk_search_vector
+        BEFORE INSERT OR UPDATE OF name, host, notes ON talks_talk
+        FOR EACH ROW EXECUTE PROCEDURE talks_talk_search_vector()""",
+)
+POSTGRES_BACKWARDS = (
+    "DROP TRIGGER talks_talk_search_vector ON talks_talk",
+    "DROP FUNCTION talks_talk_search_vector()",
+    "ALTER TABLE talks_talk DROP COLUMN search_vector",
+)
+
+
+class Migration(SchemaMigration):
+
+    def forwards(self, orm):
+        if db.backend_name == 'sqlite3':
+            for statement in SQLITE_FORWARDS:
+                db.execute(statement)
+        elif db.backend_name == 'postgres':
+            for statement in POSTGRES_FORWARDS:
+                db.execute(statement)
+            # Fill in the vector a batch of talks at a time, then index it.
+            last_pk, batch_size = 0, 500
+            while True:
+                pks = list(orm.Talk.objects.filter(pk__gt=last_pk)
+                           .order_by('pk')
+                           .values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                db.execute('UPDATE talks_talk SET name = name '
+                           'WHERE id >= %s AND id <= %s', [pks[0], pks[-1]])
+                last_pk = pks[-1]
+            db.execute('CREATE INDEX talks_talk_search_vector_idx '
+                       'ON talks_talk USING gin (search_vector)')
+
+    def backwards(self, orm):
+        if db.backend_name == 'sqlite3':
+            statements = SQLITE_BACKWARDS
+        elif db.backend_name == 'postgres':
+            statements = ('DROP INDEX talks_talk_search_vector_idx',
+                          ) + POSTGRES_BACKWARDS
+        else:
+            statements = ()
+        for statement in statements:
+            db.execute(statement)
+
+    models = {
+        u'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        u'auth.permission': {
+            'Meta': {'ordering': "(u'content_type__app_label', u'content_type__model', u'codename')", 'unique_together': "((u'content_type', u'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Group']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Permission']"}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'talks.talk': {
+            'Meta': {'ordering': "('when', 'room')", 'unique_together': "(('talk_list', 'name'),)", 'object_name': 'Talk', 'index_together': "(('talk_list', 'when'), ('talk_list', 'updated_at'))"},
+            'host': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'notes': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'notes_hash': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '40', 'blank': 'True'}),
+            'notes_html': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'room': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '255', 'blank': 'True'}),
+            'speaker_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'talk_list': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'talks'", 'to': u"orm['talks.TalkList']"}),
+            'talk_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'when': ('django.db.models.fields.DateTimeField', [], {})
+        },
+        u'talks.talklist': {
+            'Meta': {'unique_together': "(('user', 'name'),)", 'object_name': 'TalkList', 'index_together': "(('user', 'updated_at'),)"},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'schedule_version': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '255', 'blank': 'True'}),
+            'talk_count': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'lists'", 'to': u"orm['auth.User']"})
+        },
+        u'talks.tombstone': {
+            'Meta': {'object_name': 'Tombstone', 'index_together': "(('user', 'deleted_at'),)"},
+            'deleted_at': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'kind': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['auth.User']"})
+        }
+    }
+
+    complete_apps = ['talks']
\ No newline at end of file
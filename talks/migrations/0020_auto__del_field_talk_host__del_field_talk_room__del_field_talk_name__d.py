@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+SQLITE_DROP_SEARCH = (
+    "DROP TRIGGER IF EXISTS talks_talk_fts_insert",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_delete",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_update",
+    "DROP TRIGGER IF EXISTS talks_session_fts_update",
+    "DROP TABLE IF EXISTS talks_talk_fts",
+)
+POSTGRES_DROP_SEARCH = (
+    "DROP TRIGGER IF EXISTS talks_talk_search_vector ON talks_talk",
+    "DROP TRIGGER IF EXISTS talks_session_search_vector ON talks_session",
+)
+
+# The index rebuilt from the catalog, as talks.search set it up when this
+# migration was written.
+SQLITE_INSTALL_SEARCH = (
+    """CREATE VIRTUAL TABLE talks_talk_fts USING fts5(
+        name, host, notes, content='', tokenize='porter unicode61')""",
+    """CREATE TRIGGER talks_talk_fts_insert
+        AFTER INSERT ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER talks_talk_fts_delete
+        AFTER DELETE ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+    END""",
+    """CREATE TRIGGER talks_talk_fts_update
+        AFTER UPDATE OF session_id, notes ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER talks_session_fts_update
+        AFTER UPDATE OF name, host ON talks_session BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', id, old.name, old.host, notes FROM talks_talk
+        WHERE session_id = old.id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT id, new.name, new.host, notes FROM talks_talk
+        WHERE session_id = new.id;
+    END""",
+    """INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT talks_talk.id, talks_session.name, talks_session.host,
+               talks_talk.notes
+        FROM talks_talk
+        JOIN talks_session ON talks_session.id = talks_talk.session_id""",
+)
+POSTGRES_INSTALL_SEARCH = (
+    # 0013 added the search_vector column and its index.
+    """CREATE OR REPLACE FUNCTION talks_talk_search_vector() RETURNS trigger
+    AS $$ BEGIN
+        SELECT
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(host, '')), 'B') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.notes, '')), 'C')
+        INTO NEW.search_vector
+        FROM talks_session WHERE id = NEW.session_id;
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER talks_talk_search_vector
+        BEFORE INSERT OR UPDATE OF session_id, notes ON talks_talk
+        FOR EACH ROW EXECUTE PROCEDURE talks_talk_search_vector()""",
+    """CREATE OR REPLACE FUNCTION talks_session_search_vector()
+    RETURNS trigger AS $$ BEGIN
+        -- Fires talks_talk_search_vector on each of the session's talks.
+        UPDATE talks_talk SET notes = notes WHERE session_id = NEW.id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE TRIGGER talks_session_search_vector
+        AFTER UPDATE OF name, host ON talks_session
+        FOR EACH ROW EXECUTE PROCEDURE talks_session_search_vector()""",
+    # Fires the trigger on every row.
+    "UPDATE talks_talk SET notes = notes",
+)
+
+
+class Migration(SchemaMigration):
+
+    def drop_search(self):
+        if db.backend_name == 'sqlite3':
+            for statement in SQLITE_DROP_SEARCH:
+                db.execute(statement)
+        elif db.backend_name == 'postgres':
+            for statement in POSTGRES_DROP_SEARCH:
+                db.execute(statement)
+
+    def install_search(self):
+        if db.backend_name == 'sqlite3':
+            for statement in SQLITE_INSTALL_SEARCH:
+                db.execute(statement)
+        elif db.backend_name == 'postgres':
+            for statement in POSTGRES_INSTALL_SEARCH:
+                db.execute(statement)
+
+    def forwards(self, orm):
+        # The search index reads name and host from talks_talk; take it
+        # down and rebuild it from the catalog once the columns are gone.
+        self.drop_search()
+
+        # Removing unique constraint on 'Talk', fields ['talk_list', 'name']
+        db.delete_unique(u'talks_talk', ['talk_list_id', 'name'])
+
+        # Removing index on 'Talk', fields ['talk_list', 'when']
+        db.delete_index(u'talks_talk', ['talk_list_id', 'when'])
+
+        # Deleting field 'Talk.host'
+        db.delete_column(u'talks_talk', 'host')
+
+        # Deleting field 'Talk.room'
+        db.delete_column(u'talks_talk', 'room')
+
+        # Deleting field 'Talk.name'
+        db.delete_column(u'talks_talk', 'name')
+
+        # Deleting field 'Talk.when'
+        db.delete_column(u'talks_talk', 'when')
+
+        # Deleting field 'Talk.slug'
+        db.delete_column(u'talks_talk', 'slug')
+
+
+        # Changing field 'Talk.session'
+        db.alter_column(u'talks_talk', 'session_id', self.gf('django.db.models.fields.related.ForeignKey')(to=orm['talks.Session']))
+        # Adding unique constraint on 'Talk', fields ['talk_list', 'session']
+        db.create_unique(u'talks_talk', ['talk_list_id', 'session_id'])
+
+        self.install_search()
+
+
+    def backwards(self, orm):
+        # Run rebuild_search_index once back on the old schema.
+        self.drop_search()
+
+        # Removing unique constraint on 'Talk', fields ['talk_list', 'session']
+        db.delete_unique(u'talks_talk', ['talk_list_id', 'session_id'])
+
+        # Adding field 'Talk.host'
+        db.add_column(u'talks_talk', 'host',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=255),
+                      keep_default=False)
+
+        # Adding field 'Talk.room'
+        db.add_column(u'talks_talk', 'room',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=10),
+                      keep_default=False)
+
+        # Adding field 'Talk.name'
+        db.add_column(u'talks_talk', 'name',
+                      self.gf('django.db.models.fields.CharField')(default='', max_length=255),
+                      keep_default=False)
+
+        # Adding field 'Talk.when'
+        db.add_column(u'talks_talk', 'when',
+                      self.gf('django.db.models.fields.DateTimeField')(default=datetime.datetime(2014, 4, 11, 0, 0)),
+                      keep_default=False)
+
+        # Adding index on 'Talk', fields ['talk_list', 'when']
+        db.create_index(u'talks_talk', ['talk_list_id', 'when'])
+
+        # Adding field 'Talk.slug'
+        db.add_column(u'talks_talk', 'slug',
+                      self.gf('django.db.models.fields.SlugField')(default='', max_length=255, blank=True),
+                      keep_default=False)
+
+
+        # Changing field 'Talk.session'
+        db.alter_column(u'talks_talk', 'session_id', self.gf('django.db.models.fields.related.ForeignKey')(null=True, to=orm['talks.Session']))
+        # The unique constraint on ['talk_list', 'name'] comes back in
+        # 0019, once the names have been copied back from the catalog.
+
+
+    models = {
+        u'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        u'auth.permission': {
+            'Meta': {'ordering': "(u'content_type__app_label', u'content_type__model', u'codename')", 'unique_together': "((u'content_type', u'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Group']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Permission']"}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'talks.ratingrollup': {
+            'Meta': {'unique_together': "(('user', 'dimension', 'key', 'category', 'rating'),)", 'object_name': 'RatingRollup'},
+            'category': ('django.db.models.fields.CharField', [], {'max_length': '7'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'dimension': ('django.db.models.fields.CharField', [], {'max_length': '4'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'key': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'rating': ('django.db.models.fields.IntegerField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['auth.User']"})
+        },
+        u'talks.session': {
+            'Meta': {'ordering': "('when', 'room')", 'unique_together': "(('name', 'host', 'when', 'room'),)", 'object_name': 'Session'},
+            'host': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'room': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '255', 'blank': 'True'}),
+            'when': ('django.db.models.fields.DateTimeField', [], {})
+        },
+        u'talks.talk': {
+            'Meta': {'ordering': "('session__when', 'session__room')", 'unique_together': "(('talk_list', 'session'),)", 'object_name': 'Talk', 'index_together': "(('talk_list', 'updated_at'),)"},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'notes': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'notes_hash': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '40', 'blank': 'True'}),
+            'notes_html': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'session': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'talks'", 'to': u"orm['talks.Session']"}),
+            'speaker_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'talk_list': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'talks'", 'to': u"orm['talks.TalkList']"}),
+            'talk_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'talks.talklist': {
+            'Meta': {'unique_together': "(('user', 'name'),)", 'object_name': 'TalkList', 'index_together': "(('user', 'updated_at'),)"},
+            'calendar_token': ('django.db.models.fields.CharField', [], {'max_length': '32', 'unique': 'True', 'null': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'schedule_version': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '255', 'blank': 'True'}),
+            'talk_count': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'lists'", 'to': u"orm['auth.User']"})
+        },
+        u'talks.tombstone': {
+            'Meta': {'object_name': 'Tombstone', 'index_together': "(('user', 'deleted_at'),)"},
+            'deleted_at': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'kind': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['auth.User']"})
+        }
+    }
+
+    complete_apps = ['talks']
\ No newline at end of file
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+from south.utils import datetime_utils as datetime
+from south.db import db
+from south.v2 import SchemaMigration
+from django.db import models
+
+
+# South remakes SQLite tables to alter them, which drops their triggers and
+# fails while another table's trigger refers to them. Postgres alters the
+# tables in place and keeps its triggers. The search triggers as they were
+# when this migration was written:
+SQLITE_DROP_SEARCH_TRIGGERS = (
+    "DROP TRIGGER IF EXISTS talks_talk_fts_insert",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_delete",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_update",
+    "DROP TRIGGER IF EXISTS talks_session_fts_update",
+)
+SQLITE_CREATE_SEARCH_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_insert
+        AFTER INSERT ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_delete
+        AFTER DELETE ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_update
+        AFTER UPDATE OF session_id, notes ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_session_fts_update
+        AFTER UPDATE OF name, host ON talks_session BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', id, old.name, old.host, notes FROM talks_talk
+        WHERE session_id = old.id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT id, new.name, new.host, notes FROM talks_talk
+        WHERE session_id = new.id;
+    END""",
+)
+
+
+class Migration(SchemaMigration):
+
+    def drop_search_triggers(self):
+        if db.backend_name == 'sqlite3':
+            for statement in SQLITE_DROP_SEARCH_TRIGGERS:
+                db.execute(statement)
+
+    def install_search_triggers(self):
+        if db.backend_name == 'sqlite3':
+            for statement in SQLITE_CREATE_SEARCH_TRIGGERS:
+                db.execute(statement)
+
+    def forwards(self, orm):
+        self.drop_search_triggers()
+
+        # Adding unique constraint on 'TalkList', fields ['user', 'slug']
+        db.create_unique(u'talks_talklist', ['user_id', 'slug'])
+
+        # Adding unique constraint on 'Session', fields ['slug']
+        db.create_unique(u'talks_session', ['slug'])
+
+        self.install_search_triggers()
+
+    def backwards(self, orm):
+        self.drop_search_triggers()
+
+        # Removing unique constraint on 'Session', fields ['slug']
+        db.delete_unique(u'talks_session', ['slug'])
+
+        # Removing unique constraint on 'TalkList', fields ['user', 'slug']
+        db.delete_unique(u'talks_talklist', ['user_id', 'slug'])
+
+        self.install_search_triggers()
+
+    models = {
+        u'auth.group': {
+            'Meta': {'object_name': 'Group'},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '80'}),
+            'permissions': ('django.db.models.fields.related.ManyToManyField', [], {'to': u"orm['auth.Permission']", 'symmetrical': 'False', 'blank': 'True'})
+        },
+        u'auth.permission': {
+            'Meta': {'ordering': "(u'content_type__app_label', u'content_type__model', u'codename')", 'unique_together': "((u'content_type', u'codename'),)", 'object_name': 'Permission'},
+            'codename': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'content_type': ('django.db.models.fields.related.ForeignKey', [], {'to': u"orm['contenttypes.ContentType']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '50'})
+        },
+        u'auth.user': {
+            'Meta': {'object_name': 'User'},
+            'date_joined': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'email': ('django.db.models.fields.EmailField', [], {'max_length': '75', 'blank': 'True'}),
+            'first_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'groups': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Group']"}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'is_active': ('django.db.models.fields.BooleanField', [], {'default': 'True'}),
+            'is_staff': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'is_superuser': ('django.db.models.fields.BooleanField', [], {'default': 'False'}),
+            'last_login': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            'last_name': ('django.db.models.fields.CharField', [], {'max_length': '30', 'blank': 'True'}),
+            'password': ('django.db.models.fields.CharField', [], {'max_length': '128'}),
+            'user_permissions': ('django.db.models.fields.related.ManyToManyField', [], {'symmetrical': 'False', 'related_name': "u'user_set'", 'blank': 'True', 'to': u"orm['auth.Permission']"}),
+            'username': ('django.db.models.fields.CharField', [], {'unique': 'True', 'max_length': '30'})
+        },
+        u'contenttypes.contenttype': {
+            'Meta': {'ordering': "('name',)", 'unique_together': "(('app_label', 'model'),)", 'object_name': 'ContentType', 'db_table': "'django_content_type'"},
+            'app_label': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'model': ('django.db.models.fields.CharField', [], {'max_length': '100'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '100'})
+        },
+        u'talks.ratingrollup': {
+            'Meta': {'unique_together': "(('user', 'dimension', 'key', 'category', 'rating'),)", 'object_name': 'RatingRollup'},
+            'category': ('django.db.models.fields.CharField', [], {'max_length': '7'}),
+            'count': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'dimension': ('django.db.models.fields.CharField', [], {'max_length': '4'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'key': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'rating': ('django.db.models.fields.IntegerField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['auth.User']"})
+        },
+        u'talks.session': {
+            'Meta': {'ordering': "('when', 'room')", 'unique_together': "(('name', 'host', 'when', 'room'),)", 'object_name': 'Session'},
+            'host': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'room': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'unique': 'True', 'max_length': '255'}),
+            'when': ('django.db.models.fields.DateTimeField', [], {})
+        },
+        u'talks.talk': {
+            'Meta': {'ordering': "('session_when', 'session_room', 'id')", 'unique_together': "(('talk_list', 'session'),)", 'object_name': 'Talk', 'index_together': "(('talk_list', 'updated_at'), ('talk_list', 'session_when', 'session_room', 'id'))"},
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'notes': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'notes_hash': ('django.db.models.fields.CharField', [], {'default': "''", 'max_length': '40', 'blank': 'True'}),
+            'notes_html': ('django.db.models.fields.TextField', [], {'default': "''", 'blank': 'True'}),
+            'session': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'talks'", 'to': u"orm['talks.Session']"}),
+            'session_room': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'session_when': ('django.db.models.fields.DateTimeField', [], {}),
+            'speaker_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'talk_list': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'talks'", 'to': u"orm['talks.TalkList']"}),
+            'talk_rating': ('django.db.models.fields.IntegerField', [], {'default': '0', 'blank': 'True'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'})
+        },
+        u'talks.talklist': {
+            'Meta': {'unique_together': "(('user', 'name'), ('user', 'slug'))", 'object_name': 'TalkList', 'index_together': "(('user', 'updated_at'),)"},
+            'calendar_token': ('django.db.models.fields.CharField', [], {'max_length': '32', 'unique': 'True', 'null': 'True'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'name': ('django.db.models.fields.CharField', [], {'max_length': '255'}),
+            'schedule_version': ('django.db.models.fields.PositiveIntegerField', [], {'default': '0'}),
+            'slug': ('django.db.models.fields.SlugField', [], {'max_length': '255', 'blank': 'True'}),
+            'talk_count': ('django.db.models.fields.IntegerField', [], {'default': '0'}),
+            'updated_at': ('django.db.models.fields.DateTimeField', [], {'auto_now': 'True', 'blank': 'True'}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'lists'", 'to': u"orm['auth.User']"})
+        },
+        u'talks.tombstone': {
+            'Meta': {'object_name': 'Tombstone', 'index_together': "(('user', 'deleted_at'),)"},
+            'deleted_at': ('django.db.models.fields.DateTimeField', [], {'default': 'datetime.datetime.now'}),
+            u'id': ('django.db.models.fields.AutoField', [], {'primary_key': 'True'}),
+            'kind': ('django.db.models.fields.CharField', [], {'max_length': '10'}),
+            'object_id': ('django.db.models.fields.PositiveIntegerField', [], {}),
+            'user': ('django.db.models.fields.related.ForeignKey', [], {'related_name': "'+'", 'to': u"orm['auth.User']"})
+        }
+    }
+
+    complete_apps = ['talks']
\ No newline at end of file
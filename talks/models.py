@@ -1,31 +1,228 @@
+import collections
+import datetime
+import uuid
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
-from django.db import models
-from django.template.defaultfilters import slugify
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.sql import DeleteQuery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import six, timezone
+
+from . import conflicts
+from . import rendering
+from . import slugs
+
+
+class TalkListManager(models.Manager):
+    def touch(self, pks, added=0):
+        """Record that the given lists' talks changed: invalidate cached
+        renderings, bump ``updated_at`` and adjust ``talk_count`` by
+        ``added``."""
+        pks = set(pk for pk in pks if pk is not None)
+        if pks:
+            updates = {
+                'schedule_version': F('schedule_version') + 1,
+                'updated_at': timezone.now(),
+            }
+            if added:
+                updates['talk_count'] = F('talk_count') + added
+            self.filter(pk__in=pks).update(**updates)
 
-import mistune
+    def reconcile_talk_counts(self, batch_size=500):
+        """Repair ``talk_count`` drift, a batch of lists at a time. Returns
+        the number of lists that were corrected."""
+        counts = (self.order_by('pk')
+                  .annotate(actual=models.Count('talks'))
+                  .values_list('pk', 'talk_count', 'actual'))
+        repaired, last_pk = 0, 0
+        while True:
+            batch = list(counts.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return repaired
+            for pk, talk_count, actual in batch:
+                if talk_count != actual:
+                    self.filter(pk=pk).update(talk_count=actual)
+                    repaired += 1
+            last_pk = batch[-1][0]
 
 
 class TalkList(models.Model):
+    # Only ever changed by TalkListManager.touch, with F() expressions.
+    COUNTER_FIELDS = ('schedule_version', 'talk_count')
+
     user = models.ForeignKey(User, related_name='lists')
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, blank=True)
+    schedule_version = models.PositiveIntegerField(default=0, editable=False)
+    talk_count = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Secret that lets calendar apps, which can't log in, subscribe.
+    calendar_token = models.CharField(max_length=32, unique=True, null=True,
+                                      editable=False)
+
+    objects = TalkListManager()
 
     class Meta:
-        unique_together = ('user', 'name')
+        index_together = (('user', 'updated_at'),)
+        unique_together = (('user', 'name'), ('user', 'slug'))
 
     def __unicode__(self):
         return self.name
 
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.name)
+        # Keep the slug, and so the list's URL, unless the name changed.
+        if not slugs.derives_from(self.slug,
+                                  slugs.base_slug(self.name, 255, 'list')):
+            self.slug = slugs.allocate(
+                TalkList.objects.filter(user_id=self.user_id).exclude(
+                    pk=self.pk),
+                [self.name], default='list')[0]
+        if not self.calendar_token:
+            self.calendar_token = uuid.uuid4().hex
+        if (not self._state.adding and not kwargs.get('force_insert') and
+                kwargs.get('update_fields') is None):
+            # Writing our copies of the counters back would undo touch()es
+            # made since this list was loaded.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.local_concrete_fields
+                if not field.primary_key and
+                field.name not in self.COUNTER_FIELDS]
         super(TalkList, self).save(*args, **kwargs)
 
     def get_absolute_url(self):
         return reverse('talks:lists:detail', kwargs={'slug': self.slug})
 
+    def get_calendar_url(self):
+        return reverse('talks:lists:calendar',
+                       kwargs={'token': self.calendar_token})
 
-class Talk(models.Model):
+    def conflicts(self):
+        """Overlapping pairs of talks in this list. Uses prefetched talks
+        when they're available."""
+        return conflicts.find_conflicts(self.talks.all(), Talk.SLOT_LENGTH)
+
+    def remove_talks(self, pks):
+        """Delete the talks in ``pks`` from this list with one DELETE.
+        Returns a dict mapping each pk to ``'removed'`` or
+        ``'not_found'``."""
+        pks = set(pks)
+        with transaction.atomic():
+            rows = list(self.talks.filter(pk__in=pks).order_by().values_list(
+                'pk', 'session__host', 'session__room', 'talk_rating',
+                'speaker_rating'))
+            found = set(row[0] for row in rows)
+            if found:
+                self.talks.filter(pk__in=found).fast_delete()
+                TalkList.objects.touch([self.pk], added=-len(found))
+                Tombstone.objects.record(self.user_id, Tombstone.TALK, found)
+                RatingRollup.objects.rebuild(self.user_id, set(
+                    entry[:2] for row in rows
+                    for entry in RatingRollup.entries(self.pk, *row[1:])))
+        return dict((pk, 'removed' if pk in found else 'not_found')
+                    for pk in pks)
+
+    def move_talks(self, pks, target):
+        """Move the talks in ``pks`` to ``target`` with one UPDATE.
+        Talks whose session ``target`` already has are left alone. Returns a
+        dict mapping each pk to ``'moved'``, ``'conflict'`` or
+        ``'not_found'``."""
+        pks = set(pks)
+        results = dict((pk, 'not_found') for pk in pks)
+        with transaction.atomic():
+            rows = dict((row[0], row[1:]) for row in
+                        self.talks.filter(pk__in=pks).order_by().values_list(
+                            'pk', 'session', 'session__host', 'session__room',
+                            'talk_rating', 'speaker_rating'))
+            taken = set(target.talks.filter(
+                session__in=[row[0] for row in rows.values()])
+                .order_by().values_list('session', flat=True))
+            movable = []
+            for pk, row in rows.items():
+                if row[0] in taken:
+                    results[pk] = 'conflict'
+                else:
+                    movable.append(pk)
+            if movable:
+                try:
+                    with transaction.atomic():
+                        self.talks.filter(pk__in=movable).update(
+                            talk_list=target, user=target.user_id,
+                            updated_at=timezone.now())
+                except IntegrityError:
+                    # A talk for one of these sessions was added to the
+                    # target since we looked.
+                    results.update((pk, 'conflict') for pk in movable)
+                else:
+                    results.update((pk, 'moved') for pk in movable)
+                    TalkList.objects.touch([self.pk], added=-len(movable))
+                    TalkList.objects.touch([target.pk], added=len(movable))
+                    if any(RatingRollup.entries(self.pk, *rows[pk][1:])
+                           for pk in movable):
+                        RatingRollup.objects.rebuild(self.user_id, (
+                            (RatingRollup.TALK_LIST, six.text_type(self.pk)),
+                            (RatingRollup.TALK_LIST,
+                             six.text_type(target.pk))))
+        return results
+
+
+class SessionManager(models.Manager):
+    def resolve(self, keys):
+        """Map each ``Session.key`` in ``keys`` to its session, adding the
+        ones the catalog doesn't have yet. Costs four queries however many
+        keys there are."""
+        keys = set(keys)
+        found = self._find(keys)
+        missing = keys - set(found)
+        if missing:
+            sessions = [Session(**dict(zip(Session.KEY_FIELDS, key)))
+                        for key in missing]
+            for session, slug in zip(sessions, self.allocate_slugs(
+                    [session.name for session in sessions])):
+                session.slug = slug
+            try:
+                with transaction.atomic():
+                    self.bulk_create(sessions)
+            except IntegrityError:
+                # Another request added some of these since we looked.
+                for key in missing:
+                    self.get_or_create(**dict(zip(Session.KEY_FIELDS, key)))
+            found.update(self._find(missing))
+        return found
+
+    def allocate_slugs(self, names, exclude_pk=None):
+        """Free slugs for sessions named ``names``. See talks.slugs."""
+        return slugs.allocate(self.exclude(pk=exclude_pk), names,
+                              default='session')
+
+    def _find(self, keys):
+        sessions = self.filter(name__in=set(key[0] for key in keys))
+        return dict((session.key, session) for session in sessions
+                    if session.key in keys)
+
+    def cached(self, pks):
+        """Return a dict of the sessions with ``pks``, read from the shared
+        cache where possible. Every user's list shows the same catalog
+        entries, so most of these are hits."""
+        keys = dict((Session.cache_key(pk), pk) for pk in set(pks))
+        found = dict((keys[key], session)
+                     for key, session in cache.get_many(keys).items())
+        missing = set(keys.values()) - set(found)
+        if missing:
+            loaded = self.in_bulk(missing)
+            cache.set_many(dict((Session.cache_key(pk), session)
+                                for pk, session in loaded.items()),
+                           Session.CACHE_TIMEOUT)
+            found.update(loaded)
+        return found
+
+
+class Session(models.Model):
+    """A talk in the conference schedule. Shared by every user who adds it
+    to a list, so a schedule change is made once, here."""
     ROOM_CHOICES = (
         ('517D', '517D'),
         ('517C', '517C'),
@@ -33,34 +230,495 @@ class Talk(models.Model):
         ('520', '520'),
         ('710A', '710A')
     )
-    talk_list = models.ForeignKey(TalkList, related_name='talks')
+    SLOT_LENGTH = datetime.timedelta(minutes=30)
+    KEY_FIELDS = ('name', 'host', 'when', 'room')
+    CACHE_TIMEOUT = 60 * 60 * 24
+
     name = models.CharField(max_length=255)
-    slug = models.SlugField(max_length=255, blank=True)
+    slug = models.SlugField(max_length=255, unique=True)
     when = models.DateTimeField()
     room = models.CharField(max_length=10, choices=ROOM_CHOICES)
     host = models.CharField(max_length=255)
+
+    objects = SessionManager()
+
+    class Meta:
+        ordering = ('when', 'room')
+        unique_together = ('name', 'host', 'when', 'room')
+
+    def __init__(self, *args, **kwargs):
+        super(Session, self).__init__(*args, **kwargs)
+        # Remember the rating rollup groups the session was loaded with so
+        # session_saved can recount them after an edit.
+        self._saved_host = self.__dict__.get('host')
+        self._saved_room = self.__dict__.get('room')
+
+    def __unicode__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
+        super(Session, self).save(*args, **kwargs)
+
+    def fill_derived_fields(self):
+        if not slugs.derives_from(self.slug,
+                                  slugs.base_slug(self.name, 255, 'session')):
+            self.slug = Session.objects.allocate_slugs([self.name],
+                                                       exclude_pk=self.pk)[0]
+
+    @property
+    def key(self):
+        """The fields that identify a session in the catalog."""
+        return tuple(getattr(self, field) for field in self.KEY_FIELDS)
+
+    @staticmethod
+    def cache_key(pk):
+        return 'talks:session:{0}'.format(pk)
+
+
+class TalkRow(collections.namedtuple('TalkRow', (
+        'id', 'talk_list_id', 'list_slug', 'name', 'slug', 'host',
+        'session_when', 'session_room'))):
+    """The columns a list page shows of a talk, as a plain tuple. Skips
+    the notes and the cost of building a model instance; see
+    ``TalkQuerySet.rows``."""
+    __slots__ = ()
+    LOOKUPS = ('id', 'talk_list', 'talk_list__slug', 'session__name',
+               'session__slug', 'session__host', 'session_when',
+               'session_room')
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def when(self):
+        return self.session_when
+
+    @property
+    def room(self):
+        return self.session_room
+
+    def get_absolute_url(self):
+        return reverse('talks:talks:detail', kwargs={
+            'list_slug': self.list_slug, 'slug': self.slug})
+
+
+def session_field(name):
+    """A read-only attribute on ``Talk`` for a field of its session."""
+    return property(lambda talk: getattr(talk.session, name))
+
+
+class TalkQuerySet(models.query.QuerySet):
+    def conflicts(self):
+        """Return the overlapping pairs of talks in this queryset."""
+        return conflicts.find_conflicts(self.rows(), Talk.SLOT_LENGTH)
+
+    def conflicts_with(self, talks):
+        """Return the overlapping pairs of talks in this queryset that
+        include one of ``talks``, such as a page of a list. Only reads the
+        talks within a slot of them."""
+        pks = set(talk.pk for talk in talks)
+        if not pks:
+            return []
+        whens = [talk.when for talk in talks]
+        nearby = self.filter(
+            session_when__gt=min(whens) - Talk.SLOT_LENGTH,
+            session_when__lt=max(whens) + Talk.SLOT_LENGTH)
+        return [conflict for conflict in nearby.conflicts()
+                if conflict.first.pk in pks or conflict.second.pk in pks]
+
+    def overlapping(self, when):
+        """Talks whose slot overlaps one starting at ``when``."""
+        return self.filter(session_when__gt=when - Talk.SLOT_LENGTH,
+                           session_when__lt=when + Talk.SLOT_LENGTH)
+
+    def rows(self):
+        """The talks as ``TalkRow`` tuples, reading only the columns they
+        hold. Returns a list."""
+        return [TalkRow._make(row)
+                for row in self.values_list(*TalkRow.LOOKUPS)]
+
+    def talk_values(self, *fields):
+        """Like ``values()``, but the session's fields are named as if they
+        were the talk's own. Returns a list."""
+        lookups = [Talk.lookup(field) for field in fields]
+        return [dict(zip(fields, row)) for row in self.values_list(*lookups)]
+
+    def fast_delete(self):
+        """Delete the matching talks in a single statement. Unlike
+        ``delete()`` no objects are loaded and no signals are sent, so the
+        caller must do the bookkeeping ``talk_deleted`` would."""
+        DeleteQuery(self.model).delete_qs(self, self.db)
+
+
+class TalkManager(models.Manager):
+    use_for_related_fields = True
+
+    def get_queryset(self):
+        # A talk is shown by its session's name, time and room, so load
+        # them together.
+        return TalkQuerySet(self.model, using=self._db).select_related(
+            'session')
+
+    def conflicts(self):
+        return self.get_queryset().conflicts()
+
+    def conflicts_with(self, talks):
+        return self.get_queryset().conflicts_with(talks)
+
+    def overlapping(self, when):
+        return self.get_queryset().overlapping(when)
+
+
+class Talk(models.Model):
+    """A user's copy of a catalog ``Session``: which list it's on and the
+    user's ratings and notes."""
+    ROOM_CHOICES = Session.ROOM_CHOICES
+    SLOT_LENGTH = Session.SLOT_LENGTH
+    SESSION_FIELDS = ('name', 'slug', 'when', 'room', 'host')
+
+    talk_list = models.ForeignKey(TalkList, related_name='talks')
+    session = models.ForeignKey(Session, related_name='talks')
+    # The list's owner, so ownership checks needn't join talk lists.
+    user = models.ForeignKey(User, related_name='talks', editable=False)
     talk_rating = models.IntegerField(blank=True, default=0)
     speaker_rating = models.IntegerField(blank=True, default=0)
     notes = models.TextField(blank=True, default='')
     notes_html = models.TextField(blank=True, default='', editable=False)
+    notes_hash = models.CharField(max_length=40, blank=True, default='',
+                                  editable=False)
+    # Copies of the session's time and room, so a list's talks can be read
+    # in schedule order straight from an index. See talks.pagination.
+    session_when = models.DateTimeField(editable=False)
+    session_room = models.CharField(max_length=10, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = TalkManager()
+
+    name = session_field('name')
+    slug = session_field('slug')
+    when = session_field('when')
+    room = session_field('room')
+    host = session_field('host')
 
     class Meta:
-        ordering = ('when', 'room')
-        unique_together = ('talk_list', 'name')
+        index_together = (
+            ('talk_list', 'updated_at'),
+            ('talk_list', 'session_when', 'session_room', 'id'),
+            ('user', 'updated_at'),
+        )
+        ordering = ('session_when', 'session_room', 'id')
+        unique_together = ('talk_list', 'session')
+
+    def __init__(self, *args, **kwargs):
+        super(Talk, self).__init__(*args, **kwargs)
+        # Remember which list the talk was loaded from so moves can be
+        # detected after save. Read through __dict__ so a deferred column
+        # isn't fetched just for this.
+        self._saved_talk_list_id = self.__dict__.get('talk_list_id')
 
     def __unicode__(self):
         return self.name
 
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.name)
-        self.notes_html = mistune.markdown(self.notes)
+        self.fill_derived_fields()
         super(Talk, self).save(*args, **kwargs)
 
+    def fill_derived_fields(self):
+        """Compute the columns ``save`` derives from user input. Bulk inserts,
+        which bypass ``save``, call this directly."""
+        self.render_notes()
+        if (self.user_id is None or
+                self.talk_list_id != self._saved_talk_list_id):
+            self.user_id = self.talk_list.user_id
+        self.session_when = self.session.when
+        self.session_room = self.session.room
+
+    def render_notes(self):
+        """Refresh ``notes_html`` unless the notes are unchanged since the
+        last render."""
+        digest = rendering.notes_digest(self.notes)
+        if digest != self.notes_hash:
+            self.notes_html = rendering.render_notes(self.notes, digest)
+            self.notes_hash = digest
+
     def get_absolute_url(self):
-        return reverse('talks:talks:detail', kwargs={'slug': self.slug})
+        # List slugs are unique per user and sessions unique per list.
+        return reverse('talks:talks:detail', kwargs={
+            'list_slug': self.talk_list.slug, 'slug': self.session.slug})
+
+    @classmethod
+    def lookup(cls, field):
+        """The lookup for ``field`` from a talk, following ``session`` for
+        the fields the catalog holds."""
+        if field in cls.SESSION_FIELDS:
+            return 'session__' + field
+        return field
 
     @property
     def overall_rating(self):
         if self.talk_rating and self.speaker_rating:
             return (self.talk_rating + self.speaker_rating) / 2
         return 0
+
+
+class TombstoneManager(models.Manager):
+    def record(self, user_id, kind, object_ids):
+        """Note the deletion of ``object_ids`` with one INSERT."""
+        now = timezone.now()
+        self.bulk_create([
+            Tombstone(user_id=user_id, kind=kind, object_id=object_id,
+                      deleted_at=now)
+            for object_id in object_ids])
+
+
+class Tombstone(models.Model):
+    """Marks a deleted list or talk so clients syncing changes since an
+    earlier cursor learn to drop it."""
+    TALK = 'talk'
+    TALK_LIST = 'talklist'
+    KIND_CHOICES = (
+        (TALK, 'Talk'),
+        (TALK_LIST, 'List'),
+    )
+
+    user = models.ForeignKey(User, related_name='+')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = TombstoneManager()
+
+    class Meta:
+        index_together = (('user', 'deleted_at'),)
+
+    def __unicode__(self):
+        return u'{0} {1}'.format(self.kind, self.object_id)
+
+
+class RatingRollupManager(models.Manager):
+    def record(self, user_id, before, after):
+        """Apply the change from the ``before`` to the ``after`` rollup
+        entries, as returned by ``RatingRollup.entries``, to ``user_id``'s
+        counts. Costs one UPDATE per distinct change in count, plus a
+        SELECT and an INSERT when a group gets its first rating."""
+        delta = collections.Counter(after)
+        delta.subtract(before)
+        changes = collections.defaultdict(list)
+        for entry, change in delta.items():
+            if change:
+                changes[change].append(entry)
+        if not changes:
+            return
+        with transaction.atomic(savepoint=False):
+            added = [entry for change, entries in changes.items()
+                     if change > 0 for entry in entries]
+            if added:
+                existing = set(
+                    self.filter(user_id=user_id)
+                    .filter(RatingRollup.matching(added))
+                    .values_list('dimension', 'key', 'category', 'rating'))
+                missing = set(added) - existing
+                if missing:
+                    try:
+                        with transaction.atomic():
+                            self.bulk_create([
+                                RatingRollup(user_id=user_id,
+                                             dimension=dimension, key=key,
+                                             category=category, rating=rating,
+                                             count=delta[dimension, key,
+                                                         category, rating])
+                                for dimension, key, category, rating
+                                in missing])
+                    except IntegrityError:
+                        # Another request created some of these rows since
+                        # we looked; update them all instead.
+                        missing = set()
+                for change in changes:
+                    changes[change] = [entry for entry in changes[change]
+                                       if entry not in missing]
+            for change, entries in changes.items():
+                if entries:
+                    (self.filter(user_id=user_id)
+                     .filter(RatingRollup.matching(entries))
+                     .update(count=F('count') + change))
+
+    def rebuild(self, user_id, groups=None):
+        """Recount ``user_id``'s rollups from their talks with one GROUP BY
+        query per dimension. ``groups`` limits this to the given
+        ``(dimension, key)`` pairs."""
+        talks = (Talk.objects.filter(user_id=user_id)
+                 .filter(models.Q(talk_rating__gt=0) |
+                         models.Q(speaker_rating__gt=0))
+                 .order_by())
+        stale = self.filter(user_id=user_id)
+        if groups is not None:
+            keys = collections.defaultdict(set)
+            for dimension, key in groups:
+                keys[dimension].add(key)
+            if not keys:
+                return
+            query = models.Q()
+            for dimension, dimension_keys in keys.items():
+                query |= models.Q(dimension=dimension, key__in=dimension_keys)
+            stale = stale.filter(query)
+        counts = collections.Counter()
+        for dimension, field in RatingRollup.DIMENSION_FIELDS:
+            rows = talks
+            if groups is not None:
+                if dimension not in keys:
+                    continue
+                rows = rows.filter(**{field + '__in': keys[dimension]})
+            rows = (rows.values_list(field, 'talk_rating', 'speaker_rating')
+                    .annotate(count=models.Count('pk')))
+            for key, talk_rating, speaker_rating, count in rows:
+                for entry in RatingRollup.entries_for(
+                        ((dimension, six.text_type(key)),),
+                        talk_rating, speaker_rating):
+                    counts[entry] += count
+        with transaction.atomic():
+            stale.delete()
+            self.bulk_create([
+                RatingRollup(user_id=user_id, dimension=dimension, key=key,
+                             category=category, rating=rating, count=count)
+                for (dimension, key, category, rating), count
+                in counts.items()])
+
+
+class RatingRollup(models.Model):
+    """How many of a user's talks got each rating, by list, host and room.
+    Kept current as talks are rated, moved and removed, so rating analytics
+    never scan ``talks_talk``. ``manage.py rebuild_rating_rollups`` repairs
+    any drift."""
+    TALK_LIST = 'list'
+    HOST = 'host'
+    ROOM = 'room'
+    DIMENSION_CHOICES = (
+        (TALK_LIST, 'List'),
+        (HOST, 'Host'),
+        (ROOM, 'Room'),
+    )
+    DIMENSION_FIELDS = (
+        (TALK_LIST, 'talk_list'),
+        (HOST, 'session__host'),
+        (ROOM, 'session__room'),
+    )
+    TALK = 'talk'
+    SPEAKER = 'speaker'
+    CATEGORY_CHOICES = (
+        (TALK, 'Talk'),
+        (SPEAKER, 'Speaker'),
+    )
+    CATEGORY_FIELDS = (
+        (TALK, 'talk_rating'),
+        (SPEAKER, 'speaker_rating'),
+    )
+
+    user = models.ForeignKey(User, related_name='+')
+    dimension = models.CharField(max_length=4, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=255)
+    category = models.CharField(max_length=7, choices=CATEGORY_CHOICES)
+    rating = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    objects = RatingRollupManager()
+
+    class Meta:
+        unique_together = ('user', 'dimension', 'key', 'category', 'rating')
+
+    def __unicode__(self):
+        return u'{0} {1} {2}: {3}'.format(self.dimension, self.key,
+                                          self.category, self.rating)
+
+    @classmethod
+    def entries(cls, talk_list_id, host, room, talk_rating, speaker_rating):
+        """The ``(dimension, key, category, rating)`` entries one talk
+        contributes a count of one to. Unrated categories contribute
+        nothing."""
+        return collections.Counter(cls.entries_for(
+            ((cls.TALK_LIST, six.text_type(talk_list_id)), (cls.HOST, host),
+             (cls.ROOM, room)),
+            talk_rating, speaker_rating))
+
+    @classmethod
+    def entries_for(cls, groups, talk_rating, speaker_rating):
+        for category, rating in ((cls.TALK, talk_rating),
+                                 (cls.SPEAKER, speaker_rating)):
+            if rating > 0:
+                for dimension, key in groups:
+                    yield dimension, key, category, rating
+
+    @classmethod
+    def talk_entries(cls, talk, talk_list_id=None):
+        return cls.entries(talk_list_id or talk.talk_list_id, talk.host,
+                           talk.room, talk.talk_rating, talk.speaker_rating)
+
+    @staticmethod
+    def matching(entries):
+        """A ``Q`` matching the rows for ``entries``."""
+        query = models.Q()
+        for dimension, key, category, rating in entries:
+            query |= models.Q(dimension=dimension, key=key,
+                              category=category, rating=rating)
+        return query
+
+
+@receiver(post_save, sender=Talk)
+def talk_saved(sender, instance, created, **kwargs):
+    previous = instance._saved_talk_list_id
+    if created:
+        TalkList.objects.touch([instance.talk_list_id], added=1)
+    elif previous != instance.talk_list_id:
+        TalkList.objects.touch([previous], added=-1)
+        TalkList.objects.touch([instance.talk_list_id], added=1)
+        RatingRollup.objects.record(
+            instance.user_id,
+            RatingRollup.talk_entries(instance, talk_list_id=previous),
+            RatingRollup.talk_entries(instance))
+    else:
+        TalkList.objects.touch([instance.talk_list_id])
+    instance._saved_talk_list_id = instance.talk_list_id
+
+
+@receiver(post_delete, sender=Talk)
+def talk_deleted(sender, instance, **kwargs):
+    TalkList.objects.touch([instance.talk_list_id], added=-1)
+    Tombstone.objects.record(instance.user_id, Tombstone.TALK,
+                             [instance.pk])
+    RatingRollup.objects.record(instance.user_id,
+                                RatingRollup.talk_entries(instance), ())
+
+
+@receiver(post_save, sender=Session)
+def session_saved(sender, instance, created, **kwargs):
+    """Show a schedule change in every list with the session and to
+    syncing clients."""
+    cache.delete(Session.cache_key(instance.pk))
+    if not created:
+        talks = Talk.objects.filter(session=instance).order_by()
+        TalkList.objects.touch(talks.values_list('talk_list', flat=True))
+        talks.update(updated_at=timezone.now(), session_when=instance.when,
+                     session_room=instance.room)
+        groups = set()
+        for dimension, old, new in (
+                (RatingRollup.HOST, instance._saved_host, instance.host),
+                (RatingRollup.ROOM, instance._saved_room, instance.room)):
+            if old is not None and old != new:
+                groups.update(((dimension, old), (dimension, new)))
+        if groups:
+            # Recount the old and new host or room of everyone who rated
+            # this session.
+            user_ids = set(talks.filter(
+                models.Q(talk_rating__gt=0) | models.Q(speaker_rating__gt=0))
+                .values_list('user', flat=True))
+            for user_id in user_ids:
+                RatingRollup.objects.rebuild(user_id, groups)
+    instance._saved_host = instance.host
+    instance._saved_room = instance.room
+
+
+@receiver(post_delete, sender=TalkList)
+def talk_list_deleted(sender, instance, **kwargs):
+    Tombstone.objects.record(instance.user_id, Tombstone.TALK_LIST,
+                             [instance.pk])
@@ -0,0 +1,86 @@
+"""
+Keyset pagination of a list's talks in schedule order.
+
+Talks are ordered by ``(session_when, session_room, id)``, which the
+``talks_talk`` index on ``(talk_list, session_when, session_room, id)``
+covers. Instead of an offset, each page carries an opaque cursor naming
+the last talk on it, and the next page seeks past that position in the
+index, so page N costs the same as page 1 however long the list is.
+"""
+from __future__ import absolute_import
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+PAGE_SIZE = getattr(settings, 'TALKS_PAGE_SIZE', 50)
+ORDERING = ('session_when', 'session_room', 'id')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(talk):
+    """The cursor for the page after ``talk``."""
+    position = [talk.session_when.isoformat(), talk.session_room, talk.pk]
+    return base64.urlsafe_b64encode(
+        json.dumps(position).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the ``(session_when, session_room, id)`` ``cursor`` seeks
+    past."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        when, room, pk = json.loads(
+            base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        when = parse_datetime(when)
+        if when is None:
+            raise ValueError(cursor)
+        return when, room, int(pk)
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+class Page(object):
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def paginate(talks, cursor=None, per_page=PAGE_SIZE, rows=False):
+    """Return the ``Page`` of ``talks``, a queryset of one list's talks,
+    after ``cursor``, or the first page without one. With ``rows`` the page
+    holds ``TalkRow`` tuples instead of talks. Raises ``InvalidCursor`` if
+    ``cursor`` can't be decoded."""
+    talks = talks.order_by(*ORDERING)
+    if cursor:
+        when, room, pk = decode_cursor(cursor)
+        talks = talks.filter(
+            Q(session_when__gt=when) |
+            Q(session_when=when, session_room__gt=room) |
+            Q(session_when=when, session_room=room, pk__gt=pk))
+    # One extra row tells us whether there's a next page.
+    window = talks[:per_page + 1]
+    object_list = window.rows() if rows else list(window)
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        next_cursor = encode_cursor(object_list[-1])
+    return Page(object_list, next_cursor)
@@ -0,0 +1,65 @@
+"""
+Memoized rendering for small templates with a bounded set of inputs.
+
+Some partials can only ever produce a handful of different outputs, like the
+six possible rows of stars from ``show_stars``. ``memoized_partial`` renders
+each of them once per process and serves the stored HTML from then on. The
+output must depend on nothing but the value passed in: no request, user or
+other context.
+
+Setting ``TALKS_RENDER_CACHE = False`` renders every call, which is useful
+when editing the templates and for ``bench_templates --compare``.
+"""
+from __future__ import absolute_import
+
+import functools
+
+from django.conf import settings
+from django.template import Context
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+
+class BoundedRenderCache(object):
+    """Renders ``template_name`` with the context ``context_func(value)``
+    returns, keeping the output for every ``value`` in ``domain``."""
+    def __init__(self, template_name, context_func, domain):
+        self.template_name = template_name
+        self.context_func = context_func
+        self.domain = frozenset(domain)
+        self._rendered = {}
+
+    def __len__(self):
+        return len(self._rendered)
+
+    def render(self, value):
+        if not getattr(settings, 'TALKS_RENDER_CACHE', True):
+            return self.render_uncached(value)
+        if value not in self.domain:
+            return self.render_uncached(value)
+        html = self._rendered.get(value)
+        if html is None:
+            html = self._rendered[value] = self.render_uncached(value)
+        return html
+
+    def render_uncached(self, value):
+        template = get_template(self.template_name)
+        return mark_safe(template.render(Context(self.context_func(value))))
+
+    def clear(self):
+        self._rendered.clear()
+
+
+def memoized_partial(template_name, domain):
+    """Turn a function returning a template context into one returning the
+    rendered template, memoized for arguments in ``domain``. Use it under
+    ``register.simple_tag`` in place of ``register.inclusion_tag``."""
+    def decorator(func):
+        cache = BoundedRenderCache(template_name, func, domain)
+
+        @functools.wraps(func)
+        def render(value):
+            return cache.render(value)
+        render.cache = cache
+        return render
+    return decorator
@@ -0,0 +1,72 @@
+"""
+Markdown rendering for talk notes.
+
+Notes are identified by the SHA-1 of their text. ``Talk.save`` stores that
+digest next to ``notes_html`` so it can skip rendering entirely when the notes
+haven't changed, and rendered HTML is kept in a small, process-wide LRU so the
+same boilerplate notes pasted into many talks only go through mistune once.
+"""
+from __future__ import absolute_import
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+import mistune
+
+
+class LRUCache(object):
+    """A thread-safe, size-bounded mapping that evicts the least recently
+    used entry once ``maxsize`` is reached."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+notes_cache = LRUCache(getattr(settings, 'TALKS_NOTES_CACHE_SIZE', 256))
+
+
+def notes_digest(notes):
+    """Return the hex SHA-1 of ``notes``, or ``''`` for empty notes."""
+    if not notes:
+        return ''
+    return hashlib.sha1(notes.encode('utf-8')).hexdigest()
+
+
+def render_notes(notes, digest=None):
+    """Render ``notes`` to HTML, reusing a cached rendering when possible."""
+    if not notes:
+        return ''
+    if digest is None:
+        digest = notes_digest(notes)
+    html = notes_cache.get(digest)
+    if html is None:
+        html = mistune.markdown(notes)
+        notes_cache.set(digest, html)
+    return html
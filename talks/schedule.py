@@ -0,0 +1,63 @@
+"""
+Day-by-day schedule rendering for a ``TalkList``.
+
+The rendered fragment is cached under the list's ``schedule_version``, which
+is bumped whenever one of its talks is saved, moved or deleted or one of
+their sessions changes, so a repeat schedule view costs a single cache lookup
+and no queries against the talks table. Stale versions are simply never asked
+for again and age out. Rendering a new version reads the list's session ids
+and takes the sessions from the catalog cache every user shares.
+"""
+from __future__ import absolute_import
+
+import itertools
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from . import conflicts
+from .models import Session, Talk
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class Day(object):
+    def __init__(self, date, talks):
+        self.date = date
+        self.talks = talks
+
+
+def group_by_day(talks):
+    """Group talks or sessions, already ordered by ``('when', 'room')``, into
+    ``Day`` objects using the current time zone's calendar days."""
+    def local_date(talk):
+        return timezone.localtime(talk.when).date()
+    return [Day(date, list(day_talks))
+            for date, day_talks in itertools.groupby(talks, key=local_date)]
+
+
+def cache_key(talk_list):
+    return 'talks:schedule:{0}:{1}:{2}'.format(
+        talk_list.pk, talk_list.schedule_version,
+        timezone.get_current_timezone_name())
+
+
+def render_schedule(talk_list):
+    """Return the schedule fragment for ``talk_list``, rendering it only if
+    the current version isn't cached yet."""
+    key = cache_key(talk_list)
+    html = cache.get(key)
+    if html is None:
+        sessions = Session.objects.cached(
+            talk_list.talks.order_by().values_list('session', flat=True))
+        sessions = sorted(sessions.values(),
+                          key=lambda session: (session.when, session.room))
+        html = render_to_string('talks/_schedule.html', {
+            'conflicts': conflicts.find_conflicts(sessions,
+                                                  Talk.SLOT_LENGTH),
+            'days': group_by_day(sessions),
+        })
+        cache.set(key, html, CACHE_TIMEOUT)
+    return mark_safe(html)
@@ -0,0 +1,244 @@
+"""
+Full-text search over a user's talks.
+
+The index lives in the database and is kept up to date by triggers on
+``talks_talk`` and ``talks_session``, so every write path (``Talk.save``,
+``delete``, the bulk importer, ``fast_delete``, ``update``, and schedule
+changes to a catalog session) maintains it without any help from Python.
+SQLite uses a contentless FTS5 table, ``talks_talk_fts``, holding each talk's
+notes with its session's name and host; Postgres a weighted ``tsvector``
+column, ``talks_talk.search_vector``, with a GIN index. Names weigh more
+than hosts, which weigh more than notes.
+
+South remakes SQLite tables to alter them, which drops their triggers and
+fails while another table's trigger refers to them, so any migration that
+changes ``talks_talk`` or ``talks_session`` must drop the triggers first and
+create them again afterwards. It does so with its own copy of the SQL below,
+so that later changes here don't alter old migrations. ``manage.py
+rebuild_search_index`` recreates anything missing and reindexes every
+talk.
+"""
+from __future__ import absolute_import
+
+import re
+
+from django.db import connection
+
+from . import models
+
+
+MAX_TERMS = 8
+
+SQLITE_INSTALL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS talks_talk_fts USING fts5(
+        name, host, notes, content='', tokenize='porter unicode61')""",
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_insert
+        AFTER INSERT ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_delete
+        AFTER DELETE ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_talk_fts_update
+        AFTER UPDATE OF session_id, notes ON talks_talk BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', old.id, name, host, old.notes FROM talks_session
+        WHERE id = old.session_id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT new.id, name, host, new.notes FROM talks_session
+        WHERE id = new.session_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS talks_session_fts_update
+        AFTER UPDATE OF name, host ON talks_session BEGIN
+        INSERT INTO talks_talk_fts (talks_talk_fts, rowid, name, host, notes)
+        SELECT 'delete', id, old.name, old.host, notes FROM talks_talk
+        WHERE session_id = old.id;
+        INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT id, new.name, new.host, notes FROM talks_talk
+        WHERE session_id = new.id;
+    END""",
+)
+SQLITE_REBUILD = (
+    "INSERT INTO talks_talk_fts (talks_talk_fts) VALUES ('delete-all')",
+    """INSERT INTO talks_talk_fts (rowid, name, host, notes)
+        SELECT talks_talk.id, talks_session.name, talks_session.host,
+               talks_talk.notes
+        FROM talks_talk
+        JOIN talks_session ON talks_session.id = talks_talk.session_id""",
+)
+
+SQLITE_UNINSTALL = (
+    "DROP TRIGGER IF EXISTS talks_talk_fts_insert",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_delete",
+    "DROP TRIGGER IF EXISTS talks_talk_fts_update",
+    "DROP TRIGGER IF EXISTS talks_session_fts_update",
+)
+
+POSTGRES_INSTALL = (
+    """DO $$ BEGIN
+        ALTER TABLE talks_talk ADD COLUMN search_vector tsvector;
+    EXCEPTION WHEN duplicate_column THEN NULL;
+    END $$""",
+    """CREATE OR REPLACE FUNCTION talks_talk_search_vector() RETURNS trigger
+    AS $$ BEGIN
+        SELECT
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(name, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(host, '')), 'B') ||
+            setweight(to_tsvector('pg_catalog.english',
+                                  coalesce(NEW.notes, '')), 'C')
+        INTO NEW.search_vector
+        FROM talks_session WHERE id = NEW.session_id;
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS talks_talk_search_vector ON talks_talk",
+    """CREATE TRIGGER talks_talk_search_vector
+        BEFORE INSERT OR UPDATE OF session_id, notes ON talks_talk
+        FOR EACH ROW EXECUTE PROCEDURE talks_talk_search_vector()""",
+    """CREATE OR REPLACE FUNCTION talks_session_search_vector()
+    RETURNS trigger AS $$ BEGIN
+        -- Fires talks_talk_search_vector on each of the session's talks.
+        UPDATE talks_talk SET notes = notes WHERE session_id = NEW.id;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS talks_session_search_vector ON talks_session",
+    """CREATE TRIGGER talks_session_search_vector
+        AFTER UPDATE OF name, host ON talks_session
+        FOR EACH ROW EXECUTE PROCEDURE talks_session_search_vector()""",
+    """CREATE INDEX IF NOT EXISTS talks_talk_search_vector_idx ON talks_talk
+        USING gin (search_vector)""",
+)
+POSTGRES_REBUILD = (
+    # Fires the trigger on every row.
+    "UPDATE talks_talk SET notes = notes",
+)
+POSTGRES_UNINSTALL = (
+    "DROP TRIGGER IF EXISTS talks_talk_search_vector ON talks_talk",
+    "DROP TRIGGER IF EXISTS talks_session_search_vector ON talks_session",
+)
+
+
+def terms(query):
+    """The words in a user's query, without any search syntax."""
+    return re.findall(r'\w+', query or '', re.UNICODE)[:MAX_TERMS]
+
+
+class SQLiteSearch(object):
+    install_sql = SQLITE_INSTALL
+    rebuild_sql = SQLITE_REBUILD
+    uninstall_sql = SQLITE_UNINSTALL
+    from_where = """
+        FROM talks_talk_fts
+        JOIN talks_talk ON talks_talk.id = talks_talk_fts.rowid
+        WHERE talks_talk_fts MATCH %s AND talks_talk.user_id = %s"""
+    order_by = "bm25(talks_talk_fts, 10.0, 5.0, 1.0), talks_talk.id"
+
+    def match(self, terms):
+        # Every term, each as a prefix: "pyth"* "web"*
+        return u' '.join(u'"{0}"*'.format(term) for term in terms)
+
+    def order_params(self, match):
+        return []
+
+
+class PostgresSearch(object):
+    install_sql = POSTGRES_INSTALL
+    rebuild_sql = POSTGRES_REBUILD
+    uninstall_sql = POSTGRES_UNINSTALL
+    from_where = """
+        FROM talks_talk
+        WHERE talks_talk.search_vector @@ to_tsquery('pg_catalog.english', %s)
+        AND talks_talk.user_id = %s"""
+    order_by = """ts_rank(talks_talk.search_vector,
+                          to_tsquery('pg_catalog.english', %s)) DESC,
+                  talks_talk.id"""
+
+    def match(self, terms):
+        return u' & '.join(u'{0}:*'.format(term) for term in terms)
+
+    def order_params(self, match):
+        return [match]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearch,
+    'postgresql': PostgresSearch,
+}
+
+
+def get_backend():
+    try:
+        return BACKENDS[connection.vendor]()
+    except KeyError:
+        raise NotImplementedError(
+            'Talk search is not available on {0}.'.format(connection.vendor))
+
+
+def install(rebuild=False):
+    """Create the index and its triggers if they're missing, and reindex
+    every talk if ``rebuild``."""
+    backend = get_backend()
+    cursor = connection.cursor()
+    statements = backend.install_sql
+    if rebuild:
+        statements += backend.rebuild_sql
+    for statement in statements:
+        cursor.execute(statement)
+
+
+def uninstall():
+    """Drop the triggers, keeping the index. Writes to talks are no longer
+    indexed until ``install`` runs again."""
+    cursor = connection.cursor()
+    for statement in get_backend().uninstall_sql:
+        cursor.execute(statement)
+
+
+class SearchResults(object):
+    """The talks of ``user`` matching ``query``, best first. Sliced and
+    counted lazily, so it can be handed to a ``Paginator``."""
+    def __init__(self, user, query):
+        self.user = user
+        self.terms = terms(query)
+        self.backend = get_backend()
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = 0
+            if self.terms:
+                self._count = self._fetch(
+                    'SELECT COUNT(*)' + self.backend.from_where)[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if not self.terms or (stop is not None and stop <= start):
+            return []
+        sql = ('SELECT talks_talk.id' + self.backend.from_where +
+               ' ORDER BY ' + self.backend.order_by)
+        extra = self.backend.order_params(self.backend.match(self.terms))
+        if stop is not None:
+            sql += ' LIMIT %s OFFSET %s'
+            extra += [stop - start, start]
+        ids = [row[0] for row in self._fetch(sql, extra)]
+        talks = (models.Talk.objects.select_related('talk_list', 'session')
+                 .in_bulk(ids))
+        return [talks[pk] for pk in ids if pk in talks]
+
+    def _fetch(self, sql, extra=()):
+        cursor = connection.cursor()
+        cursor.execute(sql, [self.backend.match(self.terms),
+                             self.user.pk] + list(extra))
+        return cursor.fetchall()
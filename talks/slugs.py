@@ -0,0 +1,62 @@
+"""
+Collision-safe slug allocation.
+
+List slugs are unique per user and session slugs across the catalog, and
+both are looked up through the unique index that enforces it. A name's slug
+is ``slugify(name)``, or ``slugify(name)-2``, ``-3`` and so on when that's
+taken. ``allocate`` finds every taken slug a batch of names could collide
+with in one query, then hands out the rest in memory, so importing many
+sessions with the same title doesn't cost a query per candidate.
+"""
+from __future__ import absolute_import
+
+import re
+
+from django.db.models import Q
+from django.template.defaultfilters import slugify
+
+
+def base_slug(name, max_length, default):
+    return slugify(name)[:max_length].strip('-') or default
+
+
+def with_suffix(base, number, max_length):
+    if number == 1:
+        return base
+    suffix = '-{0}'.format(number)
+    return base[:max_length - len(suffix)].strip('-') + suffix
+
+
+def derives_from(slug, base):
+    """Whether ``slug`` is ``base`` or ``base`` with a number added."""
+    return re.match(r'^{0}(-\d+)?$'.format(re.escape(base)),
+                    slug or '') is not None
+
+
+def allocate(queryset, names, field='slug', max_length=255, default='item'):
+    """Return a slug for each of ``names``, in order, unused by the rows of
+    ``queryset`` and by each other. Costs one query."""
+    bases = [base_slug(name, max_length, default) for name in names]
+    if not bases:
+        return []
+    query = Q()
+    for base in set(bases):
+        if len(base) + 12 <= max_length:
+            query |= Q(**{field: base})
+            query |= Q(**{field + '__startswith': base + '-'})
+        else:
+            # Suffixed slugs of a long base are cut short to fit.
+            query |= Q(**{field + '__startswith': base[:max_length - 12]})
+    taken = set(queryset.filter(query).values_list(field, flat=True))
+    numbers = {}
+    slugs = []
+    for base in bases:
+        number = numbers.get(base, 1)
+        slug = with_suffix(base, number, max_length)
+        while slug in taken:
+            number += 1
+            slug = with_suffix(base, number, max_length)
+        numbers[base] = number + 1
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
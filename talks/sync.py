@@ -0,0 +1,100 @@
+"""
+Incremental sync of a user's lists and talks.
+
+A client sends back the opaque cursor from its previous sync and gets only
+the rows changed since then, found through the ``updated_at`` indexes, plus
+``Tombstone`` rows for anything deleted. Rows written by transactions that
+were still open when a cursor was issued may carry a slightly older
+``updated_at``, so each sync looks back ``TALKS_SYNC_OVERLAP`` seconds
+further than the cursor; clients must treat rows as upserts.
+"""
+from __future__ import absolute_import
+
+import base64
+import binascii
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import models
+
+
+OVERLAP = datetime.timedelta(
+    seconds=getattr(settings, 'TALKS_SYNC_OVERLAP', 5))
+TOMBSTONE_RETENTION = datetime.timedelta(
+    days=getattr(settings, 'TALKS_TOMBSTONE_DAYS', 30))
+
+LIST_FIELDS = ('id', 'name', 'slug', 'talk_count', 'updated_at')
+TALK_FIELDS = ('id', 'talk_list', 'name', 'slug', 'when', 'room', 'host',
+               'talk_rating', 'speaker_rating', 'notes', 'updated_at')
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(when):
+    delta = when - _EPOCH
+    microseconds = ((delta.days * 86400 + delta.seconds) * 1000000 +
+                    delta.microseconds)
+    return base64.urlsafe_b64encode(
+        str(microseconds).encode('ascii')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return the aware datetime ``cursor`` was issued at."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        microseconds = int(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return _EPOCH + datetime.timedelta(microseconds=microseconds)
+    except (TypeError, ValueError, OverflowError, UnicodeError,
+            binascii.Error):
+        raise InvalidCursor(cursor)
+
+
+def changes_since(user, cursor=None):
+    """Return the lists, talks and deletions for ``user`` since ``cursor``.
+
+    Without a cursor, or with one older than the tombstones we keep, the
+    result is a full snapshot and ``reset`` tells the client to drop
+    whatever it had.
+    """
+    now = timezone.now()
+    since = decode_cursor(cursor) if cursor else None
+    reset = since is None or since < now - TOMBSTONE_RETENTION
+
+    lists = models.TalkList.objects.filter(user=user)
+    talks = models.Talk.objects.filter(user=user)
+    deleted = {'lists': [], 'talks': []}
+    if not reset:
+        since -= OVERLAP
+        lists = lists.filter(updated_at__gt=since)
+        talks = talks.filter(updated_at__gt=since)
+        tombstones = models.Tombstone.objects.filter(
+            user=user, deleted_at__gt=since).values_list('kind', 'object_id')
+        for kind, object_id in tombstones:
+            if kind == models.Tombstone.TALK_LIST:
+                deleted['lists'].append(object_id)
+            else:
+                deleted['talks'].append(object_id)
+
+    return {
+        'cursor': encode_cursor(now),
+        'reset': reset,
+        'lists': list(lists.order_by('pk').values(*LIST_FIELDS)),
+        'talks': talks.order_by('pk').talk_values(*TALK_FIELDS),
+        'deleted': deleted,
+    }
+
+
+def prune_tombstones():
+    """Delete tombstones no client cursor can still need. Returns how many
+    were removed."""
+    expired = models.Tombstone.objects.filter(
+        deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION)
+    count = expired.count()
+    expired.delete()
+    return count
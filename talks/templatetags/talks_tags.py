@@ -1,9 +1,12 @@
 from django import template
 
+from talks import partials
+
 register = template.Library()
 
 
-@register.inclusion_tag('talks/_stars.html')
+@register.simple_tag
+@partials.memoized_partial('talks/_stars.html', domain=range(6))
 def show_stars(count):
     return {
         'star_count': range(count),
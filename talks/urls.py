@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 from django.conf.urls import patterns, url, include
 
+from . import api
 from . import views
 
 
@@ -12,9 +13,21 @@ lists_patterns = patterns(
         name='detail'),
     url(r'^s/(?P<slug>[-\w]+)/$', views.TalkListScheduleView.as_view(),
         name='schedule'),
+    url(r'^conflicts/(?P<slug>[-\w]+)/$',
+        views.TalkListConflictsView.as_view(), name='conflicts'),
     url(r'^create/$', views.TalkListCreateView.as_view(), name='create'),
     url(r'^update/(?P<slug>[-\w]+)/$', views.TalkListUpdateView.as_view(),
         name='update'),
+    url(r'^import/(?P<slug>[-\w]+)/$', views.TalkListImportView.as_view(),
+        name='import'),
+    url(r'^export/(?P<slug>[-\w]+)\.(?P<format>ics|csv)$',
+        views.TalkListExportView.as_view(), name='export'),
+    url(r'^calendar/(?P<token>[0-9a-f]+)\.ics$',
+        views.TalkListCalendarView.as_view(), name='calendar'),
+    url(r'^bulk-remove/(?P<slug>[-\w]+)/$',
+        views.TalkListBulkRemoveView.as_view(), name='bulk_remove'),
+    url(r'^bulk-move/(?P<slug>[-\w]+)/$',
+        views.TalkListBulkMoveView.as_view(), name='bulk_move'),
     url(r'^remove/(?P<talklist_pk>\d+)/(?P<pk>\d+)/$',
         views.TalkListRemoveTalkView.as_view(),
         name='remove_talk'),
@@ -22,12 +35,23 @@ lists_patterns = patterns(
 
 talks_patterns = patterns(
     '',
-    url('^d/(?P<slug>[-\w]+)/$', views.TalkDetailView.as_view(),
-        name='detail'),
+    url(r'^d/(?P<list_slug>[-\w]+)/(?P<slug>[-\w]+)/$',
+        views.TalkDetailView.as_view(), name='detail'),
+    url(r'^search/$', views.TalkSearchView.as_view(), name='search'),
+    url(r'^ratings/$', views.RatingAnalyticsView.as_view(), name='ratings'),
+)
+
+api_patterns = patterns(
+    '',
+    url(r'^lists/$', api.ListIndexView.as_view(), name='lists'),
+    url(r'^lists/(?P<pk>\d+)/$', api.ListDetailView.as_view(), name='list'),
+    url(r'^talks/(?P<pk>\d+)/$', api.TalkDetailView.as_view(), name='talk'),
+    url(r'^sync/$', api.SyncView.as_view(), name='sync'),
 )
 
 urlpatterns = patterns(
     '',
     url(r'^lists/', include(lists_patterns, namespace='lists')),
     url(r'^talks/', include(talks_patterns, namespace='talks')),
+    url(r'^api/', include(api_patterns, namespace='api')),
 )
@@ -1,18 +1,27 @@
+import collections
+
 from django.contrib import messages
-from django.db.models import Count
-from django.http import Http404
-from django.shortcuts import redirect
+from django.http import Http404, HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
 from django.views import generic
 
 from braces import views
 
+from . import analytics
+from . import api
+from . import export
 from . import forms
+from . import importing
 from . import models
+from . import pagination
+from . import schedule
+from . import search
 
 
 class RestrictToOwnerMixin(views.LoginRequiredMixin):
     def get_queryset(self):
-        return self.model.objects.filter(user=self.request.user)
+        queryset = super(RestrictToOwnerMixin, self).get_queryset()
+        return queryset.filter(user=self.request.user)
 
 
 class TalkListListView(
@@ -21,34 +30,50 @@ class TalkListListView(
 ):
     model = models.TalkList
 
-    def get_queryset(self):
-        queryset = super(TalkListListView, self).get_queryset()
-        queryset = queryset.annotate(talk_count=Count('talks'))
-        return queryset
-
 
-class TalkListDetailView(
-    RestrictToOwnerMixin,
-    views.PrefetchRelatedMixin,
-    generic.DetailView
-):
+class TalkListDetailView(RestrictToOwnerMixin, generic.DetailView):
+    """A list with one page of its talks, in schedule order, and the
+    overlaps involving them. The ``cursor`` query parameter picks the page;
+    see ``talks.pagination``."""
     form_class = forms.TalkForm
     http_method_names = ['get', 'post']
     model = models.TalkList
-    prefetch_related = ('talks',)
 
     def get_context_data(self, **kwargs):
         context = super(TalkListDetailView, self).get_context_data(**kwargs)
-        context.update({'form': self.form_class(self.request.POST or None)})
+        cursor = self.request.GET.get('cursor')
+        try:
+            # Only the columns _talk.html shows; the notes can be large.
+            page = pagination.paginate(self.object.talks.all(), cursor,
+                                       rows=True)
+        except pagination.InvalidCursor:
+            raise Http404
+        context.update({
+            'cursor': cursor,
+            'page': page,
+            'conflicts': self.object.talks.conflicts_with(page),
+            'form': self.form_class(self.request.POST or None),
+            'other_lists': self.request.user.lists.exclude(
+                pk=self.object.pk).values('pk', 'name'),
+            'calendar_url': self.request.build_absolute_uri(
+                self.object.get_calendar_url()),
+        })
         return context
 
     def post(self, request, *args, **kwargs):
         form = self.form_class(request.POST)
         if form.is_valid():
             obj = self.get_object()
-            talk = form.save(commit=False)
-            talk.talk_list = obj
+            talk = models.Talk(talk_list=obj, session=form.get_session())
+            overlapping = list(
+                obj.talks.overlapping(talk.when).values_list('session__name',
+                                                             flat=True))
             talk.save()
+            if overlapping:
+                messages.warning(
+                    request,
+                    u'{0} overlaps with {1}.'.format(
+                        talk.name, u', '.join(overlapping)))
         else:
             return self.get(request, *args, **kwargs)
         return redirect(obj)
@@ -70,14 +95,115 @@ class TalkListUpdateView(RestrictToOwnerMixin, generic.UpdateView):
     model = models.TalkList
 
 
-class TalkListScheduleView(
+class TalkListScheduleView(RestrictToOwnerMixin, generic.DetailView):
+    model = models.TalkList
+    template_name = 'talks/schedule.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(TalkListScheduleView, self).get_context_data(**kwargs)
+        context.update({'schedule': schedule.render_schedule(self.object)})
+        return context
+
+
+def export_response(request, talk_list_id, name, format):
+    """Stream the talks of a list as iCalendar or CSV."""
+    if format == 'ics':
+        return StreamingHttpResponse(
+            export.iter_ics(talk_list_id, name, request.get_host()),
+            content_type='text/calendar; charset=utf-8')
+    return StreamingHttpResponse(export.iter_csv(talk_list_id),
+                                 content_type='text/csv; charset=utf-8')
+
+
+class TalkListExportView(
+    RestrictToOwnerMixin,
+    generic.detail.SingleObjectMixin,
+    generic.View
+):
+    model = models.TalkList
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        response = export_response(request, self.object.pk, self.object.name,
+                                   kwargs['format'])
+        response['Content-Disposition'] = 'attachment; filename={0}.{1}'.format(
+            self.object.slug, kwargs['format'])
+        return response
+
+
+class TalkListCalendarView(generic.View):
+    """The list as an iCalendar feed for calendar apps to subscribe to.
+    The URL's token stands in for a login. Polls for an unchanged list get
+    a 304 after one small query."""
+    def get(self, request, *args, **kwargs):
+        try:
+            state = models.TalkList.objects.values(
+                'id', 'name', 'schedule_version', 'updated_at').get(
+                calendar_token=kwargs['token'])
+        except models.TalkList.DoesNotExist:
+            raise Http404
+        etag = api.make_etag('calendar', state['id'],
+                             state['schedule_version'], state['updated_at'])
+        last_modified = api.epoch(state['updated_at'])
+        if api.not_modified(request, etag, last_modified):
+            response = HttpResponseNotModified()
+        else:
+            response = export_response(request, state['id'], state['name'],
+                                       'ics')
+        return api.set_validators(response, etag, last_modified)
+
+
+class TalkListImportView(
+    RestrictToOwnerMixin,
+    generic.detail.SingleObjectMixin,
+    generic.FormView
+):
+    form_class = forms.ScheduleImportForm
+    model = models.TalkList
+    template_name = 'talks/talklist_import.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super(TalkListImportView, self).get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super(TalkListImportView, self).post(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        schedule = form.cleaned_data['schedule']
+        importer = importing.ScheduleImporter(self.object)
+        result = importer.run(importing.iter_rows(
+            schedule, importing.guess_format(schedule.name)))
+
+        messages.success(
+            self.request,
+            u'Imported {0} talks into {1.name}.'.format(
+                result.created, self.object))
+        for row_number, message in result.errors[:10]:
+            messages.warning(self.request,
+                             u'Row {0}: {1}'.format(row_number, message))
+        if len(result.errors) > 10:
+            messages.warning(
+                self.request,
+                u'{0} more rows were skipped.'.format(
+                    len(result.errors) - 10))
+        return redirect(self.object)
+
+
+class TalkListConflictsView(
     RestrictToOwnerMixin,
-    views.PrefetchRelatedMixin,
+    views.JSONResponseMixin,
     generic.DetailView
 ):
     model = models.TalkList
-    prefetch_related = ('talks',)
-    template_name = 'talks/schedule.html'
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return self.render_json_response({
+            'conflicts': [conflict.as_dict()
+                          for conflict in self.object.talks.conflicts()],
+        })
 
 
 class TalkListRemoveTalkView(generic.RedirectView):
@@ -88,10 +214,11 @@ class TalkListRemoveTalkView(generic.RedirectView):
 
     def get_object(self, pk, talklist_pk):
         try:
-            talk = self.model.objects.get(
+            talk = self.model.objects.select_related(
+                'talk_list', 'session').get(
                 pk=pk,
                 talk_list_id=talklist_pk,
-                talk_list__user=self.request.user
+                user=self.request.user
             )
         except models.Talk.DoesNotExist:
             raise Http404
@@ -111,12 +238,77 @@ class TalkListRemoveTalkView(generic.RedirectView):
                                                        **kwargs)
 
 
+class TalkListBulkView(
+    RestrictToOwnerMixin,
+    views.JSONResponseMixin,
+    generic.detail.SingleObjectMixin,
+    generic.View
+):
+    """Apply an action to the talks whose ids are POSTed as ``talks``.
+    AJAX requests get a JSON object mapping each id to its outcome; others
+    get a summary message and a redirect back to the list."""
+    http_method_names = ['post']
+    model = models.TalkList
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        pks = []
+        for value in request.POST.getlist('talks'):
+            try:
+                pks.append(int(value))
+            except ValueError:
+                pass
+        results = self.apply(pks)
+        if request.is_ajax():
+            return self.render_json_response({'results': results})
+        self.summarize(collections.Counter(results.values()))
+        return redirect(self.object)
+
+
+class TalkListBulkRemoveView(TalkListBulkView):
+    def apply(self, pks):
+        return self.object.remove_talks(pks)
+
+    def summarize(self, outcomes):
+        messages.success(
+            self.request,
+            u'Removed {0} talks from {1.name}.'.format(
+                outcomes['removed'], self.object))
+
+
+class TalkListBulkMoveView(TalkListBulkView):
+    def apply(self, pks):
+        try:
+            target_pk = int(self.request.POST.get('talk_list'))
+        except (TypeError, ValueError):
+            raise Http404
+        self.target = get_object_or_404(
+            models.TalkList, pk=target_pk, user=self.request.user)
+        return self.object.move_talks(pks, self.target)
+
+    def summarize(self, outcomes):
+        messages.success(
+            self.request,
+            u'Moved {0} talks to {1.name}.'.format(
+                outcomes['moved'], self.target))
+        if outcomes['conflict']:
+            messages.warning(
+                self.request,
+                u'{0} talks were not moved because {1.name} already has '
+                u'those sessions.'.format(
+                    outcomes['conflict'], self.target))
+
+
 class TalkDetailView(views.LoginRequiredMixin, generic.DetailView):
     http_method_names = ['get', 'post']
     model = models.Talk
+    slug_field = 'session__slug'
 
     def get_queryset(self):
-        return self.model.objects.filter(talk_list__user=self.request.user)
+        return self.model.objects.filter(
+            user=self.request.user,
+            talk_list__slug=self.kwargs['list_slug']).select_related(
+            'talk_list', 'session')
 
     def get_context_data(self, **kwargs):
         context = super(TalkDetailView, self).get_context_data(**kwargs)
@@ -124,7 +316,8 @@ class TalkDetailView(views.LoginRequiredMixin, generic.DetailView):
         rating_form = forms.TalkRatingForm(self.request.POST or None,
                                            instance=obj)
         list_form = forms.TalkTalkListForm(self.request.POST or None,
-                                           instance=obj)
+                                           instance=obj,
+                                           user=self.request.user)
         context.update({
             'rating_form': rating_form,
             'list_form': list_form
@@ -148,3 +341,31 @@ class TalkDetailView(views.LoginRequiredMixin, generic.DetailView):
 
         return redirect(self.object)
 
+
+class RatingAnalyticsView(views.LoginRequiredMixin, generic.TemplateView):
+    """Averages and distributions of the user's ratings by list, host and
+    room, read from ``RatingRollup``."""
+    template_name = 'talks/ratings.html'
+
+    def get_context_data(self, **kwargs):
+        context = super(RatingAnalyticsView, self).get_context_data(**kwargs)
+        context['dimensions'] = analytics.rating_analytics(self.request.user)
+        return context
+
+
+class TalkSearchView(views.LoginRequiredMixin, generic.ListView):
+    """Ranked full-text search over the user's talks. See ``talks.search``."""
+    paginate_by = 20
+    template_name = 'talks/talk_search.html'
+
+    def get_queryset(self):
+        return search.SearchResults(self.request.user, self.query)
+
+    @property
+    def query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_context_data(self, **kwargs):
+        context = super(TalkSearchView, self).get_context_data(**kwargs)
+        context['query'] = self.query
+        return context